@@ -1,9 +1,19 @@
 __version__ = "1.0.0"
 
 # from strunc.strunc import format_val_unc_from_str
-from strunc.pformat_float import pfloat
+from strunc.pformat_float import pfloat, pdecimal
 from strunc.prefix_float import prefix_float
+from strunc.template import FormatTemplate
+from strunc.lazy import LazyFloat, LazyValUnc, FormattedColumn
+from strunc.running import RunningValUnc
+from strunc.bound import BoundFloat, bind_format_spec
+from strunc.plan import FormatPlan
+from strunc.sig_fig_rules import (SigFigRule, register_sig_fig_rule,
+                                  get_sig_fig_rule)
 
-__all__ = ['pformat_float', 'prefix_float']
+__all__ = ['pformat_float', 'pdecimal', 'prefix_float', 'SigFigRule',
+           'register_sig_fig_rule', 'get_sig_fig_rule', 'FormatTemplate',
+           'LazyFloat', 'LazyValUnc', 'FormattedColumn', 'RunningValUnc',
+           'BoundFloat', 'bind_format_spec', 'FormatPlan']
 
 't'
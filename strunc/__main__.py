@@ -0,0 +1,6 @@
+import sys
+
+from strunc.cli import main
+
+
+sys.exit(main())
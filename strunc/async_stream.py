@@ -0,0 +1,162 @@
+import asyncio
+from concurrent.futures import Executor
+from functools import partial
+from typing import AsyncIterable, AsyncIterator, Callable, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from strunc.batch import format_batch, format_val_unc_batch
+
+
+async def iter_batches(source: AsyncIterable, max_batch_size: int,
+                       max_latency: float) -> AsyncIterator[list]:
+    """
+    Group items from source into lists of at most max_batch_size items. A
+    batch is also emitted once max_latency seconds have passed since its
+    first item arrived. The pending read from source is kept across batches
+    rather than cancelled, so slow sources are not interrupted.
+    """
+    loop = asyncio.get_running_loop()
+    source_iter = source.__aiter__()
+    next_item = None
+    batch = []
+    deadline = None
+    try:
+        while True:
+            if next_item is None:
+                next_item = asyncio.ensure_future(source_iter.__anext__())
+            if batch:
+                timeout = max(deadline - loop.time(), 0)
+            else:
+                timeout = None
+            done, _ = await asyncio.wait({next_item}, timeout=timeout)
+            if not done:
+                yield batch
+                batch = []
+                continue
+
+            finished, next_item = next_item, None
+            try:
+                item = finished.result()
+            except StopAsyncIteration:
+                break
+            if not batch:
+                deadline = loop.time() + max_latency
+            batch.append(item)
+            if len(batch) >= max_batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        if next_item is not None:
+            next_item.cancel()
+
+
+async def abatch_format(source: AsyncIterable,
+                        batch_func: Callable[[list], list[str]],
+                        max_batch_size: int = 256,
+                        max_latency: float = 0.005,
+                        max_pending_batches: int = 4,
+                        executor: Optional[Executor] = None
+                        ) -> AsyncIterator[str]:
+    """
+    Collect items from source into micro-batches (see iter_batches()),
+    format each batch with batch_func in executor (the loop's default
+    executor if None) and yield the results in input order. At most
+    max_pending_batches formatted or in-flight batches are buffered; beyond
+    that reading from source pauses until the consumer catches up.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=max_pending_batches)
+
+    async def produce():
+        batches = iter_batches(source, max_batch_size, max_latency)
+        try:
+            async for batch in batches:
+                await queue.put(
+                    loop.run_in_executor(executor, batch_func, batch))
+        except Exception as exc:
+            failed = loop.create_future()
+            failed.set_exception(exc)
+            await queue.put(failed)
+        finally:
+            await batches.aclose()
+        await queue.put(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            future = await queue.get()
+            if future is None:
+                break
+            for formatted_str in await future:
+                yield formatted_str
+        await producer
+    finally:
+        producer.cancel()
+
+
+def as_float_array(nums: list):
+    """
+    nums as a numpy float array for the vectorized batch path if numpy is
+    available and all of nums are floats. Other numbers, e.g. ints or
+    Decimals, keep their exact formatting and are returned unchanged.
+    """
+    if np is not None and all(isinstance(num, float) for num in nums):
+        return np.asarray(nums, dtype=float)
+    return nums
+
+
+def format_items(items: list, format_spec: str = '') -> list[str]:
+    return format_batch(as_float_array(items), format_spec)
+
+
+def format_val_unc_items(items: list[tuple], format_spec: str = ''
+                         ) -> list[str]:
+    """
+    Format (val, unc) and (val, unc, unc_2) items. Items of each length are
+    formatted as one batch and the results are returned in input order.
+    """
+    idxs_by_len: dict[int, list[int]] = {}
+    for idx, item in enumerate(items):
+        if not 2 <= len(item) <= 3:
+            raise ValueError(f'Expected (val, unc) or (val, unc, unc_2) '
+                             f'items, got {item!r}.')
+        idxs_by_len.setdefault(len(item), []).append(idx)
+
+    val_unc_strs = [''] * len(items)
+    for idxs in idxs_by_len.values():
+        formatter_args = [as_float_array(list(column)) for column in
+                          zip(*(items[idx] for idx in idxs))]
+        for idx, val_unc_str in zip(idxs, format_val_unc_batch(
+                *formatter_args[:2], format_spec, *formatter_args[2:])):
+            val_unc_strs[idx] = val_unc_str
+    return val_unc_strs
+
+
+def aformat_stream(source: AsyncIterable[float], format_spec: str = '',
+                   **kwargs) -> AsyncIterator[str]:
+    """
+    Format numbers from an async iterable with a pfloat or prefix_float
+    format spec without blocking the event loop. Batches of floats take the
+    vectorized numpy path, see as_float_array(). kwargs are passed to
+    abatch_format().
+    """
+    batch_func = partial(format_items, format_spec=format_spec)
+    return abatch_format(source, batch_func, **kwargs)
+
+
+def aformat_val_unc_stream(source: AsyncIterable[tuple],
+                           format_spec: str = '',
+                           **kwargs) -> AsyncIterator[str]:
+    """
+    Format (val, unc) or (val, unc, unc_2) tuples from an async iterable
+    with a format_val_unc format spec without blocking the event loop. The
+    two kinds of tuple may be mixed. kwargs are passed to abatch_format().
+    """
+    batch_func = partial(format_val_unc_items, format_spec=format_spec)
+    return abatch_format(source, batch_func, **kwargs)
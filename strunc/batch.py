@@ -0,0 +1,57 @@
+from typing import Iterable, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from strunc.pformat_float import parse_format_spec, pformat_float_array
+from strunc.prefix_float import compile_format_spec, get_prefix_exp_str
+from strunc.digits import is_shortest_repr_float
+from strunc.strunc2 import (compile_format_spec as compile_val_unc_spec,
+                            format_val_unc_array,
+                            parse_format_spec as parse_val_unc_spec)
+
+
+def format_batch(nums: Iterable[float], format_spec: str = '',
+                 monotonic: Optional[bool] = None) -> list[str]:
+    """
+    Format a batch of numbers with one pfloat or prefix_float format spec
+    which is parsed once. numpy float arrays go through the vectorized
+    pformat_float_array(), which exploits sorted input, see
+    get_mantissa_exp_array() for monotonic.
+    """
+    if (np is not None and isinstance(nums, np.ndarray)
+            and nums.dtype.kind == 'f'):
+        if format_spec.endswith('p'):
+            return pformat_float_array(
+                nums, parse_format_spec(format_spec[:-1]), monotonic,
+                exp_str_func=get_prefix_exp_str)
+        return pformat_float_array(nums, parse_format_spec(format_spec),
+                                   monotonic)
+
+    formatter = compile_format_spec(format_spec)
+    return [formatter(num) for num in nums]
+
+
+def format_val_unc_batch(vals: Iterable[float], uncs: Iterable[float],
+                         format_spec: str = '',
+                         uncs_2: Optional[Iterable[float]] = None
+                         ) -> list[str]:
+    """
+    Format a batch of value/uncertainty pairs with one format_val_unc format
+    spec which is parsed once. numpy float arrays go through the vectorized
+    format_val_unc_array().
+    """
+    columns = [vals, uncs] if uncs_2 is None else [vals, uncs, uncs_2]
+    if np is not None and all(
+            isinstance(column, np.ndarray) and column.dtype.kind == 'f'
+            and not is_shortest_repr_float(column) for column in columns):
+        return format_val_unc_array(vals, uncs,
+                                    parse_val_unc_spec(format_spec), uncs_2)
+
+    formatter = compile_val_unc_spec(format_spec)
+    if uncs_2 is None:
+        return [formatter(val, unc) for val, unc in zip(vals, uncs)]
+    return [formatter(val, unc, unc_2)
+            for val, unc, unc_2 in zip(vals, uncs, uncs_2)]
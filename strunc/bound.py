@@ -0,0 +1,99 @@
+from functools import lru_cache
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from strunc.prefix_float import compile_format_spec
+
+
+class BoundFloat(float):
+    """
+    float with a default pfloat/prefix_float format spec, used by str() and
+    by format() with an empty spec. Subclasses for a given spec are created
+    with bind_format_spec(). Arithmetic, including with numpy scalars, and
+    numpy ufuncs on a single value return the same subclass, so results
+    keep the spec. Operations involving numpy arrays return plain arrays.
+    """
+    __slots__ = ()
+    format_spec = ''
+    _formatter = staticmethod(compile_format_spec(''))
+
+    def __str__(self):
+        return self._formatter(float(self))
+
+    def __format__(self, format_spec: str) -> str:
+        if not format_spec:
+            return self._formatter(float(self))
+        return compile_format_spec(format_spec)(float(self))
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({float.__repr__(self)})'
+
+    def __reduce__(self):
+        if type(self) is BoundFloat:
+            return BoundFloat, (float(self),)
+        return rebuild_bound_float, (self.format_spec, float(self),
+                                     self.__class__.__name__)
+
+    def _wrap(self, result):
+        if isinstance(result, float):
+            return self.__class__(result)
+        return result
+
+    if np is not None:
+        def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+            inputs = tuple(float(x) if isinstance(x, BoundFloat) else x
+                           for x in inputs)
+            result = getattr(ufunc, method)(*inputs, **kwargs)
+            if isinstance(result, np.floating):
+                return self.__class__(result)
+            return result
+
+
+def wrap_float_method(name: str):
+    float_method = getattr(float, name)
+
+    def method(self, *args):
+        result = float_method(self, *args)
+        if result is NotImplemented:
+            return result
+        return self._wrap(result)
+    method.__name__ = name
+    method.__qualname__ = f'BoundFloat.{name}'
+    return method
+
+
+for method_name in ['__add__', '__radd__', '__sub__', '__rsub__', '__mul__',
+                    '__rmul__', '__truediv__', '__rtruediv__',
+                    '__floordiv__', '__rfloordiv__', '__mod__', '__rmod__',
+                    '__pow__', '__rpow__', '__neg__', '__pos__', '__abs__',
+                    '__round__']:
+    setattr(BoundFloat, method_name, wrap_float_method(method_name))
+
+
+def bind_format_spec(format_spec: str,
+                     name: Optional[str] = None) -> type[BoundFloat]:
+    """
+    Return a BoundFloat subclass whose values format with format_spec by
+    default, e.g. kHz = bind_format_spec('_3rp'); str(kHz(15300.0)) gives
+    '15.3 k'. The spec is compiled once per class and the same class is
+    returned for repeated calls with the same spec and name.
+    """
+    if name is None:
+        name = f'BoundFloat[{format_spec!r}]'
+    return create_bound_float_class(format_spec, name)
+
+
+@lru_cache(maxsize=None)
+def create_bound_float_class(format_spec: str, name: str) -> type[BoundFloat]:
+    return type(name, (BoundFloat,),
+                {'__slots__': (), 'format_spec': format_spec,
+                 '_formatter': staticmethod(compile_format_spec(format_spec))})
+
+
+def rebuild_bound_float(format_spec: str, num: float,
+                        name: Optional[str] = None) -> BoundFloat:
+    return bind_format_spec(format_spec, name)(num)
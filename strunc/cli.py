@@ -0,0 +1,229 @@
+import argparse
+import asyncio
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from decimal import Decimal
+from functools import partial
+from itertools import islice
+import os
+import sys
+import time
+from typing import Callable, Iterable, Iterator, Optional, TextIO
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from strunc.async_stream import format_val_unc_items
+from strunc.batch import format_batch
+from strunc.server import MAX_MESSAGE_SIZE, serve
+
+
+def parse_rows(lines: list[str], delimiter: Optional[str],
+               decimal: bool) -> list[list]:
+    """
+    Split and parse lines into rows of numbers. Blank lines give empty rows,
+    empty fields between delimiters are errors.
+    """
+    parse_num = Decimal if decimal else float
+    rows = []
+    for line in lines:
+        if not line.strip():
+            rows.append([])
+            continue
+        fields = line.split(delimiter)
+        if '' in fields:
+            raise ValueError(f'Empty field in line {line!r}.')
+        try:
+            rows.append([parse_num(field) for field in fields])
+        except (ValueError, ArithmeticError):
+            raise ValueError(f'Invalid number in line {line!r}.') from None
+    return rows
+
+
+def format_chunk(lines: list[str], format_spec: str = '',
+                 val_unc: bool = False, delimiter: Optional[str] = None,
+                 decimal: bool = False) -> str:
+    """
+    Format a chunk of input lines and return the output text, one line per
+    input line. Every column is formatted with format_spec unless val_unc is
+    set, in which case each line holds val, unc and optionally unc_2.
+    """
+    rows = parse_rows(lines, delimiter, decimal)
+    out_delimiter = delimiter or ' '
+
+    if val_unc:
+        for row in rows:
+            if row and not 2 <= len(row) <= 3:
+                raise ValueError(f'Expected 2 or 3 columns (val, unc[, '
+                                 f'unc_2]), got {len(row)}.')
+        # Rows of floats take the vectorized batch path.
+        val_unc_strs = iter(format_val_unc_items(
+            [row for row in rows if row], format_spec))
+        return ''.join(f'{next(val_unc_strs) if row else ""}\n'
+                       for row in rows)
+
+    nums = [num for row in rows for num in row]
+    if np is not None and not decimal:
+        nums = np.array(nums, dtype=float)
+    num_strs = iter(format_batch(nums, format_spec))
+    return ''.join(
+        out_delimiter.join(islice(num_strs, len(row))) + '\n'
+        for row in rows)
+
+
+def iter_chunks(files: Iterable[TextIO],
+                chunk_size: int) -> Iterator[list[str]]:
+    for file in files:
+        while True:
+            lines = [line.rstrip('\r\n') for line in islice(file, chunk_size)]
+            if not lines:
+                break
+            yield lines
+
+
+def iter_parallel(executor: Executor, func: Callable,
+                  chunks: Iterable, max_pending: int) -> Iterator:
+    """
+    Ordered executor.map() which only submits max_pending chunks ahead of
+    the consumer so memory use stays bounded for arbitrarily long input.
+    """
+    pending = deque()
+    for chunk in chunks:
+        pending.append(executor.submit(func, chunk))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def open_inputs(paths: list[str]) -> Iterator[TextIO]:
+    for path in paths:
+        if path == '-':
+            yield sys.stdin
+        else:
+            with open(path, buffering=1 << 20) as file:
+                yield file
+
+
+def run_format(args: argparse.Namespace) -> int:
+    func = partial(format_chunk, format_spec=args.format_spec,
+                   val_unc=args.val_unc, delimiter=args.delimiter,
+                   decimal=args.decimal)
+    chunks = iter_chunks(open_inputs(args.files or ['-']), args.chunk_size)
+
+    num_rows = 0
+    start = time.perf_counter()
+    out = sys.stdout
+    try:
+        if args.workers > 1:
+            with ProcessPoolExecutor(args.workers) as executor:
+                for chunk_str in iter_parallel(executor, func, chunks,
+                                               2 * args.workers):
+                    out.write(chunk_str)
+                    num_rows += chunk_str.count('\n')
+        else:
+            for chunk in chunks:
+                out.write(func(chunk))
+                num_rows += len(chunk)
+        out.flush()
+    except (ValueError, ArithmeticError) as exc:
+        print(f'strunc: {exc}', file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # The reader, e.g. head, has gone. Point stdout at devnull so that
+        # flushing it at exit does not raise again.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 1
+    elapsed = time.perf_counter() - start
+
+    if args.stats:
+        rate = num_rows / elapsed if elapsed > 0 else float('inf')
+        print(f'{num_rows} rows in {elapsed:.3f} s ({rate:.0f} rows/s)',
+              file=sys.stderr)
+    return 0
+
+
+def run_serve(args: argparse.Namespace) -> int:
+    if args.unix is not None:
+        address = args.unix
+    else:
+        address = f'{args.host}:{args.port}'
+    print(f'strunc: serving on {address}', file=sys.stderr)
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix,
+                          args.max_message_size))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='strunc',
+        description='Format numbers with strunc format specs.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    format_parser = subparsers.add_parser(
+        'format',
+        help='Format numbers or val/unc columns read from files or stdin.')
+    format_parser.add_argument(
+        'format_spec',
+        help="pfloat or prefix_float spec, e.g. '_3e' or '_3rp', or a "
+             "val/unc spec with --val-unc, e.g. 'S'.")
+    format_parser.add_argument(
+        'files', nargs='*',
+        help="Input files. '-' or no files reads stdin.")
+    format_parser.add_argument(
+        '-u', '--val-unc', action='store_true',
+        help='Read val, unc and optional unc_2 columns and format them '
+             'together.')
+    format_parser.add_argument(
+        '-d', '--delimiter', default=None,
+        help='Column delimiter. Defaults to whitespace on input and a '
+             'single space on output.')
+    format_parser.add_argument(
+        '--decimal', action='store_true',
+        help='Parse numbers as Decimal and format their exact digits.')
+    format_parser.add_argument(
+        '-j', '--workers', type=int, default=1,
+        help='Number of worker processes formatting chunks in parallel.')
+    format_parser.add_argument(
+        '--chunk-size', type=int, default=10000,
+        help='Number of lines per chunk.')
+    format_parser.add_argument(
+        '--stats', action='store_true',
+        help='Report rows and rows/second on stderr.')
+    format_parser.set_defaults(func=run_format)
+
+    serve_parser = subparsers.add_parser(
+        'serve',
+        help='Serve length-prefixed batch format requests on a local socket, '
+             'see strunc.server.')
+    serve_parser.add_argument(
+        '--host', default='127.0.0.1',
+        help='TCP host to listen on.')
+    serve_parser.add_argument(
+        '--port', type=int, default=8765,
+        help='TCP port to listen on.')
+    serve_parser.add_argument(
+        '--unix', default=None, metavar='PATH',
+        help='Listen on a Unix socket at PATH instead of TCP.')
+    serve_parser.add_argument(
+        '--max-message-size', type=int, default=MAX_MESSAGE_SIZE,
+        metavar='BYTES',
+        help='Reject requests longer than BYTES and close the connection.')
+    serve_parser.set_defaults(func=run_serve)
+
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = get_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
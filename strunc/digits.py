@@ -0,0 +1,233 @@
+import sys
+from math import floor, log10, isfinite, isnan
+from decimal import Decimal, Context, ROUND_HALF_EVEN
+from numbers import Integral
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def get_float_dtype(num):
+    """
+    numpy floating dtype of num or None for python floats, ints and
+    non-floating numpy types.
+    """
+    if np is None:
+        return None
+    dtype = getattr(num, 'dtype', None)
+    if dtype is not None and np.issubdtype(dtype, np.floating):
+        return dtype
+    return None
+
+
+def match_float_type(value, like):
+    """
+    Cast value to the numpy float type of like. Arithmetic on a float32
+    scalar may be carried out in float64; casting the result back drops
+    digits the input type cannot hold, e.g. 0.1f * 10 -> 1.0f.
+    """
+    dtype = get_float_dtype(like)
+    if dtype is None:
+        return value
+    return dtype.type(value)
+
+
+def get_magnitude(num: float) -> int:
+    """
+    Number of digits in the integer part of num, at least 1, used to budget
+    the digits available to the fractional part.
+    """
+    int_part = int(num)
+    if int_part != 0:
+        return int(log10(int_part)) + 1
+    return 1
+
+
+def get_top_digit_array(nums):
+    """
+    Vectorized top digit as given for floats by
+    pformat_float.get_top_digit() and strunc2.get_top_and_bottom_digit().
+    Non-finite entries get top digit 0.
+    """
+    nums = np.abs(np.asarray(nums, dtype=float))
+    nums = np.where(np.isfinite(nums), nums, 0)
+    int_part = np.trunc(nums)
+    with np.errstate(divide='ignore'):
+        log10_int_part = np.log10(np.where(int_part == 0, 1, int_part))
+        log10_nums = np.log10(np.where(nums == 0, 1, nums))
+    magnitude = np.where(int_part == 0, 1, np.floor(log10_int_part) + 1)
+    top_digit = np.where(magnitude >= sys.float_info.dig, magnitude,
+                         np.floor(log10_nums)).astype(np.int64)
+
+    # np.log10() may differ from math.log10() in the last place, which only
+    # matters next to a power of ten.
+    redo = ((np.abs(log10_nums - np.rint(log10_nums)) < 1e-9)
+            | (np.abs(log10_int_part - np.rint(log10_int_part)) < 1e-9))
+    for i in np.flatnonzero(redo & (nums != 0)):
+        num = float(nums.flat[i])
+        int_part = int(num)
+        if int_part != 0 and int(log10(int_part)) + 1 >= sys.float_info.dig:
+            top_digit.flat[i] = int(log10(int_part)) + 1
+        else:
+            top_digit.flat[i] = floor(log10(num))
+    return top_digit
+
+
+def get_bottom_digit_array(nums):
+    """
+    Vectorized bottom digit as given by pformat_float.get_bottom_digit().
+    Non-finite entries get bottom digit 0. Dtypes whose digits as_exact()
+    takes from their shortest repr, e.g. float32, are read off that repr
+    element by element.
+    """
+    if is_shortest_repr_float(nums):
+        return np.array(
+            [get_exact_top_and_bottom_digit(as_exact(num))[1]
+             for num in np.ravel(nums)],
+            dtype=np.int64).reshape(np.shape(nums))
+    max_digits = sys.float_info.dig
+    nums = np.abs(np.asarray(nums, dtype=float))
+    nums = np.where(np.isfinite(nums), nums, 0)
+
+    int_part = np.trunc(nums)
+    with np.errstate(divide='ignore'):
+        int_magnitude = np.floor(
+            np.log10(np.where(int_part == 0, 1, int_part))) + 1
+    magnitude = np.where(int_part == 0, 1, int_magnitude).astype(np.int64)
+
+    active = magnitude < max_digits
+    num_places = np.where(active, max_digits - magnitude, 0)
+    frac_part = nums - int_part
+    frac_digits = np.floor(frac_part * np.power(10.0, num_places) + 0.5)
+    frac_digits = frac_digits.astype(np.int64)
+
+    num_trailing_zeros = np.zeros_like(frac_digits)
+    strip = active & (frac_digits != 0) & (frac_digits % 10 == 0)
+    while strip.any():
+        frac_digits = np.where(strip, frac_digits // 10, frac_digits)
+        num_trailing_zeros += strip
+        strip = strip & (frac_digits % 10 == 0)
+
+    precision = np.where(frac_digits == 0, 0, num_places - num_trailing_zeros)
+    bottom_digit = np.where(active, -precision, 0)
+    return bottom_digit
+
+
+def round_float(num, ndigits: int):
+    """
+    round() which rounds numpy floats as python floats, i.e. on their exact
+    decimal value, and casts back. numpy rounds in the scalar's own
+    precision which for float16 can land on a neighbouring value. Decimals
+    are rounded exactly with round_decimal().
+    """
+    if isinstance(num, Decimal):
+        return round_decimal(num, ndigits)
+    if get_float_dtype(num) is None:
+        return round(num, ndigits)
+    return match_float_type(round(float(num), ndigits), num)
+
+
+def as_exact(num):
+    """
+    Convert integers, including numpy integers, to Decimal so that integers
+    above 2**53 are formatted exactly. numpy floats other than float64, e.g.
+    float32, are converted to the Decimal of their shortest round-trip repr
+    so that their digits are not padded with the noise of their float64
+    value, e.g. np.float32(1e12) gives Decimal('1E+12') rather than
+    999999995904. Other types are returned unchanged.
+    """
+    if isinstance(num, Integral) and not isinstance(num, bool):
+        return Decimal(int(num))
+    if is_shortest_repr_float(num):
+        return Decimal(np.format_float_scientific(num, unique=True))
+    return num
+
+
+def is_shortest_repr_float(num) -> bool:
+    """
+    Whether num, a number or numpy array, is of a numpy float type whose
+    digits as_exact() takes from its shortest repr.
+    """
+    dtype = get_float_dtype(num)
+    return dtype is not None and dtype != np.float64
+
+
+def is_finite(num) -> bool:
+    if isinstance(num, Decimal):
+        return num.is_finite()
+    return isfinite(num)
+
+
+def is_nan(num) -> bool:
+    if isinstance(num, Decimal):
+        return num.is_nan()
+    return isnan(num)
+
+
+def get_exact_top_and_bottom_digit(num: Decimal) -> tuple[int, int]:
+    """
+    Top and bottom digit read off the Decimal's own digits and exponent, so
+    Decimal('1.50') has bottom digit -2. As for floats the bottom digit is
+    at most 0.
+    """
+    if not num.is_finite():
+        return 0, 0
+    bottom_digit = min(num.as_tuple().exponent, 0)
+    if num == 0:
+        return 0, bottom_digit
+    return num.adjusted(), bottom_digit
+
+
+def round_decimal(num: Decimal, ndigits: int) -> Decimal:
+    """
+    Exact round-half-even of num to ndigits decimal places, with enough
+    context precision for integers of any size.
+    """
+    if not num.is_finite():
+        return num
+    prec = max(num.adjusted() + ndigits + 2, 2)
+    context = Context(prec=prec, rounding=ROUND_HALF_EVEN)
+    return num.quantize(Decimal(1).scaleb(-ndigits), context=context)
+
+
+def abs_exact(num):
+    """
+    abs() which, for Decimals, does not round to the context precision.
+    """
+    if isinstance(num, Decimal):
+        return num.copy_abs()
+    return abs(num)
+
+
+def mul_pow10(num, exp: int):
+    """
+    num * 10**exp, exact for Decimals of any length.
+    """
+    if isinstance(num, Decimal):
+        prec = max(len(num.as_tuple().digits), 1)
+        return num.scaleb(exp, context=Context(prec=prec))
+    return num * 10**exp
+
+
+def exact_pow2(exp: int) -> Decimal:
+    if exp >= 0:
+        return Decimal(2**exp)
+    return mul_pow10(Decimal(5**-exp), exp)
+
+
+def get_exact_log2_floor(num: Decimal) -> int:
+    num = num.copy_abs()
+    exp = floor(float(num.log10(context=Context(prec=16))) / log10(2))
+    while exact_pow2(exp) > num:
+        exp -= 1
+    while exact_pow2(exp + 1) <= num:
+        exp += 1
+    return exp
+
+
+def mul_exact(num: Decimal, other: Decimal) -> Decimal:
+    prec = len(num.as_tuple().digits) + len(other.as_tuple().digits)
+    context = Context(prec=prec)
+    return context.multiply(num, other).normalize(context)
@@ -0,0 +1,387 @@
+from collections import OrderedDict
+from typing import Optional, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from strunc.digits import (as_exact, get_top_digit_array,
+                           is_shortest_repr_float)
+from strunc.pformat_float import (FormatType, SignMode, get_exp_str,
+                                  get_mantissa_exp, get_mantissa_exp_array,
+                                  get_round_digit_array, parse_format_spec,
+                                  pformat_float_array)
+from strunc.prefix_float import (compile_format_spec as compile_num_spec,
+                                 get_prefix_exp_str, iec_val_to_prefix_dict,
+                                 si_val_to_prefix_dict)
+from strunc.sig_fig_rules import (POW10, round_float_array,
+                                   scale_pow10_array)
+from strunc.strunc2 import (DisplayMode, FormatType as ValUncFormatType,
+                            compile_format_spec as compile_val_unc_spec,
+                            format_val_unc_array, get_symbs,
+                            parse_format_spec as parse_val_unc_spec,
+                            round_val_unc_array)
+
+
+class LazyFloat:
+    """
+    Deferred pfloat/prefix_float formatting of num. Nothing is formatted
+    until str() or format() is called and the result is memoized, so e.g.
+    logger.debug('x = %s', LazyFloat(x, '_3e')) costs only the construction
+    of this object when debug messages are filtered out. An empty format()
+    spec uses the spec given on construction.
+    """
+    __slots__ = ('num', 'format_spec', '_cache')
+
+    def __init__(self, num: float, format_spec: str = ''):
+        self.num = num
+        self.format_spec = format_spec
+        self._cache = None
+
+    def __repr__(self):
+        return (f'{self.__class__.__name__}({self.num!r}, '
+                f'{self.format_spec!r})')
+
+    def __str__(self):
+        return self.__format__('')
+
+    def __format__(self, format_spec: str) -> str:
+        format_spec = format_spec or self.format_spec
+        if self._cache is None:
+            self._cache = {}
+        try:
+            return self._cache[format_spec]
+        except KeyError:
+            num_str = compile_num_spec(format_spec)(self.num)
+            self._cache[format_spec] = num_str
+            return num_str
+
+
+class LazyValUnc:
+    """
+    Deferred format_val_unc formatting of val, unc and optional lower
+    uncertainty unc_2. Like LazyFloat, formatting happens on the first
+    str() or format() call and is memoized.
+    """
+    __slots__ = ('val', 'unc', 'unc_2', 'format_spec', '_cache')
+
+    def __init__(self, val: float, unc: float, format_spec: str = '',
+                 unc_2: Optional[float] = None):
+        self.val = val
+        self.unc = unc
+        self.unc_2 = unc_2
+        self.format_spec = format_spec
+        self._cache = None
+
+    def __repr__(self):
+        unc_2_str = '' if self.unc_2 is None else f', unc_2={self.unc_2!r}'
+        return (f'{self.__class__.__name__}({self.val!r}, {self.unc!r}, '
+                f'{self.format_spec!r}{unc_2_str})')
+
+    def __str__(self):
+        return self.__format__('')
+
+    def __format__(self, format_spec: str) -> str:
+        format_spec = format_spec or self.format_spec
+        if self._cache is None:
+            self._cache = {}
+        try:
+            return self._cache[format_spec]
+        except KeyError:
+            formatter = compile_val_unc_spec(format_spec)
+            val_unc_str = formatter(self.val, self.unc, self.unc_2)
+            self._cache[format_spec] = val_unc_str
+            return val_unc_str
+
+
+def as_float_column(nums):
+    nums = np.ravel(nums)
+    if nums.dtype.kind != 'f':
+        nums = nums.astype(float)
+    return nums
+
+
+def as_float64_column(nums):
+    """
+    nums as a 1-d float64 array. Narrower floats, e.g. float32, are widened
+    through their shortest repr to keep their digits.
+    """
+    nums = np.ravel(nums)
+    if is_shortest_repr_float(nums):
+        return np.array([float(as_exact(num)) for num in nums], dtype=float)
+    return nums.astype(float, copy=False)
+
+
+class FormattedColumn:
+    """
+    Read-only view formatting a 1-d numpy float array with a pfloat or
+    prefix_float format spec on access. column[i] and column[i:j] format
+    only the windows of window_size elements they touch; the last
+    max_windows formatted windows are kept. max_width() and shared_exp()
+    are worked out from the vectorized digit analysis without formatting
+    any cells. Non-float arrays are converted to float.
+
+    If uncs, and optionally uncs_2, are given the column shows nums as
+    values with their uncertainties, formatted with a format_val_unc format
+    spec.
+    """
+    __slots__ = ('nums', 'uncs', 'uncs_2', 'format_spec', 'window_size',
+                 'max_windows', '_format_spec_data', '_prefix', '_windows')
+
+    def __init__(self, nums, format_spec: str = '', window_size: int = 256,
+                 max_windows: int = 4, uncs=None, uncs_2=None):
+        if uncs is None:
+            if uncs_2 is not None:
+                raise ValueError('uncs_2 requires uncs.')
+            self.nums = as_float_column(nums)
+            self.uncs = self.uncs_2 = None
+        else:
+            # The val/unc analysis is vectorized for float64 only.
+            self.nums, self.uncs, self.uncs_2 = [
+                None if column is None else as_float64_column(column)
+                for column in (nums, uncs, uncs_2)]
+        for column in (self.uncs, self.uncs_2):
+            if column is not None and len(column) != len(self.nums):
+                raise ValueError(f'Expected {len(self.nums)} uncertainties, '
+                                 f'got {len(column)}.')
+        self.format_spec = format_spec
+        self.window_size = window_size
+        self.max_windows = max_windows
+        self._windows = OrderedDict()
+        if self.uncs is not None:
+            self._prefix = False
+            self._format_spec_data = parse_val_unc_spec(format_spec)
+            return
+        self._prefix = format_spec.endswith('p')
+        if self._prefix:
+            format_spec = format_spec[:-1]
+        self._format_spec_data = parse_format_spec(format_spec)
+
+    def __repr__(self):
+        return (f'{self.__class__.__name__}(<{len(self)} {self.nums.dtype}>, '
+                f'{self.format_spec!r})')
+
+    def __len__(self):
+        return len(self.nums)
+
+    def _get_window(self, start: int) -> list[str]:
+        try:
+            self._windows.move_to_end(start)
+            return self._windows[start]
+        except KeyError:
+            pass
+        window = slice(start, start + self.window_size)
+        if self.uncs is not None:
+            num_strs = self._format_val_unc(window)
+        else:
+            num_strs = pformat_float_array(
+                self.nums[window], self._format_spec_data,
+                exp_str_func=(get_prefix_exp_str if self._prefix
+                              else get_exp_str))
+        self._windows[start] = num_strs
+        if len(self._windows) > self.max_windows:
+            self._windows.popitem(last=False)
+        return num_strs
+
+    def _get_columns(self) -> list:
+        return [column for column in (self.nums, self.uncs, self.uncs_2)
+                if column is not None]
+
+    def _format_val_unc(self, rows) -> list[str]:
+        columns = [column[rows] for column in self._get_columns()]
+        return format_val_unc_array(*columns[:2], self._format_spec_data,
+                                    *columns[2:])
+
+    def __getitem__(self, idx: Union[int, slice]):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        idx = range(len(self))[idx]
+        start = idx - idx % self.window_size
+        return self._get_window(start)[idx - start]
+
+    def __iter__(self):
+        for start in range(0, len(self), self.window_size):
+            yield from self._get_window(start)
+
+    def _round_val_unc(self):
+        unc_columns = self._get_columns()[1:]
+        return round_val_unc_array(self.nums, unc_columns,
+                                   self._format_spec_data)
+
+    def shared_exp(self) -> int:
+        """
+        Exponent of the largest finite element, e.g. to label the column
+        once and format its mantissas with a common scale. For val/unc
+        columns this is the exponent of the largest rounded value.
+        """
+        if self.uncs is not None:
+            vectorized, vals_rounded, _, _, exps = self._round_val_unc()
+            if not vectorized.any():
+                return 0
+            abs_vals = np.where(vectorized, np.abs(vals_rounded), -1)
+            return int(exps[np.argmax(abs_vals)])
+        nums = np.abs(self.nums[np.isfinite(self.nums)])
+        if nums.size == 0:
+            return 0
+        _, exp = get_mantissa_exp(as_exact(nums.max()),
+                                  self._format_spec_data.format_type)
+        return exp
+
+    def get_widths(self):
+        """
+        Length of every formatted element, as a numpy int array. Dtypes
+        formatted from their shortest repr, e.g. float32, are formatted to
+        measure them.
+        """
+        if self.uncs is not None:
+            return self._get_val_unc_widths()
+        if is_shortest_repr_float(self.nums):
+            return np.array([len(num_str) for num_str in self],
+                            dtype=np.int64)
+        format_spec_data = self._format_spec_data
+        format_type = format_spec_data.format_type
+        nums = self.nums
+        finite = np.isfinite(nums)
+
+        mantissas, exps = get_mantissa_exp_array(nums, format_type)
+        round_digits = get_round_digit_array(
+            mantissas, format_spec_data.precision, format_spec_data.prec_type)
+        abs_mantissas = np.where(finite, np.abs(mantissas.astype(float)), 0)
+        with np.errstate(over='ignore', invalid='ignore'):
+            rounded = scale_pow10_array(
+                np.rint(scale_pow10_array(abs_mantissas, -round_digits)),
+                round_digits)
+        # Scaling only overflows when rounding far below the float's
+        # precision, where it leaves the value unchanged.
+        rounded = np.where(np.isfinite(rounded), rounded, abs_mantissas)
+        with np.errstate(divide='ignore'):
+            int_len = np.where(rounded >= 1,
+                               np.floor(np.log10(np.where(rounded >= 1,
+                                                          rounded, 1))) + 1,
+                               1).astype(np.int64)
+        if format_spec_data.top_padded_digit is not None:
+            int_len = np.maximum(int_len,
+                                 format_spec_data.top_padded_digit + 1)
+        frac_len = np.where(round_digits < 0, 1 - round_digits, 0)
+        if format_spec_data.sign_mode is SignMode.NEGATIVE:
+            sign_len = nums < 0
+        else:
+            sign_len = 1
+
+        if format_type is FormatType.DECIMAL:
+            exp_len = 0
+        else:
+            exp_len = 2 + np.maximum(
+                2, np.floor(np.log10(np.maximum(np.abs(exps), 1))) + 1)
+            exp_len = exp_len.astype(np.int64)
+            if self._prefix:
+                if (format_type is FormatType.BINARY
+                        or format_type is FormatType.BINARY_IEC):
+                    val_to_prefix_dict = iec_val_to_prefix_dict
+                else:
+                    val_to_prefix_dict = si_val_to_prefix_dict
+                prefix_len = np.array(
+                    [len(val_to_prefix_dict.get(exp, '')) + 1
+                     if exp in val_to_prefix_dict else -1
+                     for exp in range(exps.min(initial=0),
+                                      exps.max(initial=0) + 1)])
+                exp_prefix_len = prefix_len[exps - exps.min(initial=0)]
+                exp_len = np.where(exp_prefix_len >= 0, exp_prefix_len,
+                                   exp_len)
+
+        widths = sign_len + int_len + frac_len + exp_len
+        non_finite_len = np.array([len(str(num)) for num in nums[~finite]],
+                                  dtype=np.int64)
+        widths = np.asarray(widths, dtype=np.int64).copy()
+        widths[~finite] = non_finite_len
+        return widths
+
+    def _get_val_unc_widths(self):
+        format_spec_data = self._format_spec_data
+        vectorized, vals_rounded, rounded_columns, bottom_digit, exps = (
+            self._round_val_unc())
+
+        # Mantissas are scaled as format_rounded_val_unc() scales them.
+        exp_idx = np.minimum(np.abs(exps), len(POW10) - 1)
+        exp_scale = np.where(exps <= 0, POW10[exp_idx], 1 / POW10[exp_idx])
+        mantissas = [column * exp_scale
+                     for column in [vals_rounded, *rounded_columns]]
+        top_digits = [np.maximum(get_top_digit_array(mantissa), 0)
+                      for mantissa in mantissas]
+        top_digit_target = np.maximum.reduce(
+            [*top_digits, np.full(len(self), format_spec_data.top_digit)])
+        prec = np.maximum(exps - bottom_digit, 0)
+
+        def get_printed_top_digit(mantissa):
+            # Top digit of the mantissa as printed with prec decimals, which
+            # may round e.g. 9.999999999999998 up to 10. Above 1e14
+            # get_top_digit_array() counts every integer digit, so those
+            # rare mantissas are counted exactly.
+            mantissa = round_float_array(np.abs(mantissa), prec)
+            top_digit = get_top_digit_array(mantissa)
+            large = np.flatnonzero(mantissa >= 1e14)
+            top_digit[large] = [len(str(int(num))) - 1
+                                for num in mantissa[large].tolist()]
+            return top_digit
+
+        def get_mantissa_len(mantissa, top_digit):
+            pad_len = (top_digit_target - top_digit) * len(
+                format_spec_data.fill_char)
+            int_len = np.maximum(get_printed_top_digit(mantissa), 0) + 1
+            group_len = 0
+            if format_spec_data.grouping_char:
+                group_len = (int_len - 1) // 3
+            return pad_len + int_len + group_len + prec + (prec > 0)
+
+        val_len, *unc_lens = map(get_mantissa_len, mantissas, top_digits)
+        if format_spec_data.sign_symbol_rule in '+ ':
+            val_len = val_len + 1
+        else:
+            val_len = val_len + (mantissas[0] < 0)
+
+        symbs = get_symbs(format_spec_data.display_mode)
+        short_form = format_spec_data.short_form and self.uncs_2 is None
+        if short_form:
+            # The uncertainty's leading zeros, padding and decimal point are
+            # dropped.
+            unc_top_digit = get_printed_top_digit(mantissas[1])
+            group_len = 0
+            if format_spec_data.grouping_char:
+                group_len = np.maximum(unc_top_digit, 0) // 3
+            widths = val_len + unc_top_digit + prec + 3 + group_len
+        elif self.uncs_2 is None:
+            widths = val_len + len(symbs.pm) + unc_lens[0]
+        else:
+            widths = (val_len + unc_lens[0] + unc_lens[1] + 5
+                      + len(symbs.l_paren) + len(symbs.r_paren))
+
+        if format_spec_data.format_type is not ValUncFormatType.DECIMAL:
+            exp_digits = np.floor(np.log10(np.maximum(np.abs(exps), 1))) + 1
+            exp_sign = exps < 0
+            if format_spec_data.display_mode is DisplayMode.PRETTY_PRINT:
+                exp_len = len(symbs.times) + 2 + exp_digits + exp_sign
+            elif format_spec_data.display_mode is DisplayMode.LATEX:
+                exp_len = len(symbs.times) + 5 + exp_digits + exp_sign
+            else:
+                exp_len = len(symbs.times) + np.maximum(3, exp_digits + 1)
+            widths = widths + exp_len
+            if not short_form:
+                widths = widths + len(symbs.l_paren) + len(symbs.r_paren)
+
+        widths = np.asarray(widths, dtype=np.int64).copy()
+        fallback_rows = np.flatnonzero(~vectorized)
+        if fallback_rows.size:
+            widths[fallback_rows] = [
+                len(val_unc_str)
+                for val_unc_str in self._format_val_unc(fallback_rows)]
+        return widths
+
+    def max_width(self) -> int:
+        """
+        Width of the longest formatted element, e.g. to align a table
+        column before any of its rows are formatted.
+        """
+        if len(self) == 0:
+            return 0
+        return int(self.get_widths().max())
@@ -0,0 +1,135 @@
+"""
+pandas .strunc accessors. Importing this module registers them:
+
+    import strunc.pandas_accessor
+
+    df.strunc.format_val_unc('amp', 'amp_err', 'S')
+    df['freq'].strunc.prefix('_3R')
+    df.style.format(styler_formatter('_3e'), subset=['freq'])
+"""
+from typing import Callable, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from strunc.batch import format_batch, format_val_unc_batch
+from strunc.prefix_float import compile_format_spec
+
+
+def get_values(series: pd.Series) -> np.ndarray:
+    """
+    numpy values of series with nullable extension dtypes, e.g. Float64 or
+    Int64, unwrapped to their numpy dtype so floats take the vectorized
+    path. Missing values must already be dropped.
+    """
+    return series.to_numpy(dtype=getattr(series.dtype, 'numpy_dtype', None))
+
+
+def to_str_series(strs: list[str], mask: pd.Series,
+                  na_rep: Optional[str]) -> pd.Series:
+    out = pd.Series(na_rep, index=mask.index, dtype=object)
+    out[~mask] = strs
+    return out
+
+
+def format_series(series: pd.Series, format_spec: str = '',
+                  na_rep: Optional[str] = None) -> pd.Series:
+    mask = series.isna()
+    strs = format_batch(get_values(series[~mask]), format_spec)
+    return to_str_series(strs, mask, na_rep)
+
+
+def format_val_unc_series(val: pd.Series, unc: pd.Series,
+                          format_spec: str = '',
+                          unc_2: Optional[pd.Series] = None,
+                          na_rep: Optional[str] = None) -> pd.Series:
+    """
+    float64 columns, including nullable Float64 ones, are formatted with the
+    vectorized format_val_unc_array() once missing rows are dropped.
+    """
+    columns = [val, unc] if unc_2 is None else [val, unc, unc_2]
+    mask = pd.concat([column.isna() for column in columns], axis=1).any(
+        axis=1)
+    strs = format_val_unc_batch(
+        *(get_values(column[~mask]) for column in columns[:2]), format_spec,
+        *(get_values(column[~mask]) for column in columns[2:]))
+    return to_str_series(strs, mask, na_rep)
+
+
+def styler_formatter(format_spec: str = '',
+                     na_rep: str = '') -> Callable[[object], str]:
+    """
+    Single value formatter for pandas Styler.format(). The spec is compiled
+    once and missing values are shown as na_rep.
+    """
+    formatter = compile_format_spec(format_spec)
+
+    def format_value(num) -> str:
+        if pd.isna(num):
+            return na_rep
+        return formatter(num)
+    return format_value
+
+
+@pd.api.extensions.register_series_accessor('strunc')
+class StruncSeriesAccessor:
+    def __init__(self, series: pd.Series):
+        self._series = series
+
+    def format(self, format_spec: str = '',
+               na_rep: Optional[str] = None) -> pd.Series:
+        """
+        Format with a pfloat or prefix_float format spec. Missing values
+        give na_rep, or stay missing if na_rep is None.
+        """
+        return format_series(self._series, format_spec, na_rep)
+
+    def prefix(self, format_spec: str = '',
+               na_rep: Optional[str] = None) -> pd.Series:
+        """
+        Format with a prefix_float format spec. The trailing 'p' is optional.
+        """
+        if not format_spec.endswith('p'):
+            format_spec += 'p'
+        return format_series(self._series, format_spec, na_rep)
+
+
+@pd.api.extensions.register_dataframe_accessor('strunc')
+class StruncDataFrameAccessor:
+    def __init__(self, df: pd.DataFrame):
+        self._df = df
+
+    def format_val_unc(self, val: str, unc: str, format_spec: str = '',
+                       unc_2: Optional[str] = None,
+                       na_rep: Optional[str] = None) -> pd.Series:
+        """
+        Format the val and unc (and unc_2) columns together with a
+        format_val_unc format spec. Rows with any missing entry give na_rep,
+        or stay missing if na_rep is None.
+        """
+        df = self._df
+        return format_val_unc_series(
+            df[val], df[unc], format_spec,
+            None if unc_2 is None else df[unc_2], na_rep)
+
+    def format(self, column_specs: Mapping, na_rep: Optional[str] = None
+               ) -> pd.DataFrame:
+        """
+        Format several columns at once. As for format_structured(),
+        column_specs maps a column name, or a (val, unc[, unc_2]) tuple of
+        column names, to its format spec and the output column is named
+        after the (val) column.
+        """
+        columns = {}
+        for key, format_spec in column_specs.items():
+            name = key[0] if isinstance(key, tuple) else key
+            if name in columns:
+                raise ValueError(f'More than one column spec gives output '
+                                 f'column {name!r}.')
+            if isinstance(key, tuple):
+                columns[name] = self.format_val_unc(*key[:2], format_spec,
+                                                    *key[2:3], na_rep=na_rep)
+            else:
+                columns[name] = format_series(self._df[key], format_spec,
+                                              na_rep)
+        return pd.DataFrame(columns, index=self._df.index)
@@ -1,17 +1,31 @@
 import sys
-from typing import Optional
+from typing import Callable, Optional
 from dataclasses import dataclass
 from enum import Enum
 import re
-from math import log10, log2, floor, isfinite
+from math import log10, log2, floor
+from decimal import Decimal
 import logging
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from strunc.digits import (get_magnitude, match_float_type,
+                           get_float_dtype, get_top_digit_array,
+                           get_bottom_digit_array, round_float, as_exact,
+                           is_finite, get_exact_top_and_bottom_digit,
+                           get_exact_log2_floor, exact_pow2, mul_exact,
+                           mul_pow10, abs_exact, is_shortest_repr_float)
+from strunc.sig_fig_rules import scale_pow10, scale_pow10_array
+
 
 logger = logging.getLogger(__name__)
 
 
 def get_top_digit(num: float) -> int:
-    num = abs(num)
+    num = abs(float(num))
     int_part = int(num)
     if int_part == 0:
         magnitude = 1
@@ -29,13 +43,13 @@ def get_top_digit(num: float) -> int:
 
 
 def get_bottom_digit(num: float) -> int:
-    num = abs(num)
+    if is_shortest_repr_float(num):
+        _, bottom_digit = get_exact_top_and_bottom_digit(as_exact(num))
+        return bottom_digit
     max_digits = sys.float_info.dig
+    num = abs(float(num))
     int_part = int(num)
-    if int_part == 0:
-        magnitude = 1
-    else:
-        magnitude = int(log10(int_part)) + 1
+    magnitude = get_magnitude(num)
 
     if magnitude >= max_digits:
         return 0
@@ -44,7 +58,7 @@ def get_bottom_digit(num: float) -> int:
     multiplier = 10 ** (max_digits - magnitude)
     frac_digits = multiplier + int(multiplier * frac_part + 0.5)
     while frac_digits % 10 == 0:
-        frac_digits /= 10
+        frac_digits //= 10
     precision = int(log10(frac_digits))
 
     bottom_digit = -precision
@@ -53,6 +67,8 @@ def get_bottom_digit(num: float) -> int:
 
 
 def get_top_and_bottom_digit(num: float) -> tuple[int, int]:
+    if isinstance(num, Decimal) or is_shortest_repr_float(num):
+        return get_exact_top_and_bottom_digit(as_exact(num))
     return get_top_digit(num), get_bottom_digit(num)
 
 
@@ -84,7 +100,7 @@ class FormatType(Enum):
 
 def get_mantissa_exp(num: float, format_type: FormatType) -> (float, int):
     if num == 0:
-        mantissa = 0
+        mantissa = num if isinstance(num, Decimal) else 0
         exp = 0
     elif format_type is FormatType.DECIMAL:
         mantissa = num
@@ -92,24 +108,188 @@ def get_mantissa_exp(num: float, format_type: FormatType) -> (float, int):
     elif (format_type is FormatType.SCIENTIFIC
             or format_type is FormatType.ENGINEERING
             or format_type is FormatType.ENGINEERING_SHIFTED):
-        exp = floor(log10(abs(num)))
+        if isinstance(num, Decimal):
+            exp = num.adjusted()
+        else:
+            exp = floor(log10(abs(num)))
         if format_type is FormatType.ENGINEERING:
             exp = (exp // 3) * 3
         elif format_type is FormatType.ENGINEERING_SHIFTED:
             exp = ((exp + 1) // 3) * 3
-        mantissa = num * 10 ** -exp
+        if isinstance(num, Decimal):
+            mantissa = mul_pow10(num, -exp)
+        else:
+            mantissa = match_float_type(scale_pow10(float(num), -exp), num)
     elif (format_type is FormatType.BINARY
             or format_type is FormatType.BINARY_IEC):
-        exp = floor(log2(abs(num)))
+        if isinstance(num, Decimal):
+            exp = get_exact_log2_floor(num)
+        else:
+            exp = floor(log2(abs(num)))
         if format_type is FormatType.BINARY_IEC:
             exp = (exp // 10) * 10
-        mantissa = num * 2**-exp
+        if isinstance(num, Decimal):
+            mantissa = mul_exact(num, exact_pow2(-exp))
+        else:
+            mantissa = match_float_type(float(num) * 2**-exp, num)
     else:
         raise ValueError(f'Unhandled format type {format_type}')
 
     return mantissa, exp
 
 
+def get_exp_array(abs_values, format_type: FormatType):
+    """
+    Vectorized exponent of positive finite abs_values for a non-decimal
+    format type.
+    """
+    if (format_type is FormatType.SCIENTIFIC
+            or format_type is FormatType.ENGINEERING
+            or format_type is FormatType.ENGINEERING_SHIFTED):
+        exp = np.floor(np.log10(abs_values)).astype(np.int64)
+        if format_type is FormatType.ENGINEERING:
+            exp = (exp // 3) * 3
+        elif format_type is FormatType.ENGINEERING_SHIFTED:
+            exp = ((exp + 1) // 3) * 3
+    elif (format_type is FormatType.BINARY
+            or format_type is FormatType.BINARY_IEC):
+        exp = np.floor(np.log2(abs_values)).astype(np.int64)
+        if format_type is FormatType.BINARY_IEC:
+            exp = (exp // 10) * 10
+    else:
+        raise ValueError(f'Unhandled format type {format_type}')
+    return exp
+
+
+exp_segment_params = {
+    # format type: (base, exponent step, boundary offset)
+    FormatType.SCIENTIFIC: (10.0, 1, 0),
+    FormatType.ENGINEERING: (10.0, 3, 0),
+    FormatType.ENGINEERING_SHIFTED: (10.0, 3, -1),
+    FormatType.BINARY: (2.0, 1, 0),
+    FormatType.BINARY_IEC: (2.0, 10, 0),
+}
+
+
+def get_exp_segments(abs_values, format_type: FormatType):
+    """
+    Exponents of the positive, finite and ascending abs_values. The
+    exponent is only evaluated at the ends; the boundaries where it steps
+    up, e.g. 1e3 and 1e6 for engineering format, are found by binary
+    search. Returns (segment exponents, segment lengths), or None if the
+    exponents at the boundaries don't match get_exp_array(), in which case
+    it should be used instead.
+    """
+    if abs_values.size == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    base, step, offset = exp_segment_params[format_type]
+    exp_first, exp_last = get_exp_array(abs_values[[0, -1]], format_type)
+    seg_exps = np.arange(exp_first, exp_last + 1, step, dtype=np.int64)
+    boundaries = np.power(base, (seg_exps[1:] + offset).astype(float))
+    starts = np.searchsorted(abs_values, boundaries, side='left')
+    seg_lengths = np.diff(starts, prepend=0, append=abs_values.size)
+
+    check_idx = np.unique(np.concatenate(
+        [[0, abs_values.size - 1], starts, starts - 1]).clip(
+            0, abs_values.size - 1))
+    seg_idx = np.searchsorted(starts, check_idx, side='right')
+    if not np.array_equal(seg_exps[seg_idx],
+                          get_exp_array(abs_values[check_idx], format_type)):
+        return None
+    return seg_exps, seg_lengths
+
+
+def scale_by_exp_array(values, exp, format_type: FormatType):
+    """
+    values / base**exp as in get_mantissa_exp(). Decimal exponents divide by
+    the exact power of ten rather than multiplying by the inexact
+    np.power(10.0, -exp), which would e.g. make the mantissa of 1e5
+    0.9999999999999999 and round it to one digit more than pformat_float().
+    """
+    if exp_segment_params[format_type][0] == 2.0:
+        return np.ldexp(values, -exp)
+    return scale_pow10_array(values, -exp)
+
+
+def is_monotonic(values) -> bool:
+    diff = np.diff(values)
+    return bool((diff >= 0).all() or (diff <= 0).all())
+
+
+def get_exp_array_monotonic(values, format_type: FormatType):
+    """
+    Exponents of the finite monotonic values, computed once per exponent
+    segment. Zeros get exponent 0. Returns None if the segments can't be
+    used.
+    """
+    descending = values.size > 1 and values[0] > values[-1]
+    if descending:
+        values = values[::-1]
+    zero_start = np.searchsorted(values, 0, side='left')
+    zero_end = np.searchsorted(values, 0, side='right')
+
+    exps_pieces = []
+    for abs_values, reverse in [(-values[:zero_start][::-1], True),
+                                (values[zero_end:], False)]:
+        segments = get_exp_segments(abs_values, format_type)
+        if segments is None:
+            return None
+        exps = np.repeat(*segments)
+        exps_pieces.append(exps[::-1] if reverse else exps)
+    num_zeros = zero_end - zero_start
+    exp = np.concatenate([exps_pieces[0], np.zeros(num_zeros, dtype=np.int64),
+                          exps_pieces[1]])
+    return exp[::-1] if descending else exp
+
+
+def get_mantissa_exp_array_monotonic(values, format_type: FormatType):
+    """
+    Segment-wise get_mantissa_exp_array() for finite monotonic values.
+    Returns None if the segments can't be used.
+    """
+    exp = get_exp_array_monotonic(values, format_type)
+    if exp is None:
+        return None
+    return scale_by_exp_array(values, exp, format_type), exp
+
+
+def get_mantissa_exp_array(nums, format_type: FormatType,
+                           monotonic: Optional[bool] = None):
+    """
+    Vectorized get_mantissa_exp(). Mantissas keep the floating dtype of nums.
+    Zero and non-finite entries get exponent 0.
+
+    Sorted input, e.g. axis values or sweeps, is split into segments of
+    equal exponent found by binary search so that logarithms are computed
+    once per segment rather than per element.
+    monotonic=None checks for sorted 1-d input, True asserts it without
+    checking and False disables the segment path. Segment boundaries are
+    verified against the per-element exponent so results are identical.
+    """
+    dtype = get_float_dtype(nums)
+    if dtype is None:
+        dtype = np.dtype(float)
+    values = np.asarray(nums, dtype=float)
+
+    if format_type is FormatType.DECIMAL:
+        return values.astype(dtype), np.zeros(values.shape, dtype=np.int64)
+
+    if (monotonic is not False and values.ndim == 1
+            and np.isfinite(values).all()
+            and (monotonic or is_monotonic(values))):
+        result = get_mantissa_exp_array_monotonic(values, format_type)
+        if result is not None:
+            mantissa, exp = result
+            return mantissa.astype(dtype), exp
+
+    abs_values = np.abs(values)
+    nonzero = np.isfinite(abs_values) & (abs_values != 0)
+    safe_abs_values = np.where(nonzero, abs_values, 1.0)
+    exp = np.where(nonzero, get_exp_array(safe_abs_values, format_type), 0)
+    mantissa = scale_by_exp_array(values, exp, format_type)
+    return mantissa.astype(dtype), exp
+
+
 def get_exp_str(exp: int, format_type: FormatType) -> str:
     if format_type is format_type.DECIMAL:
         exp_str = ''
@@ -203,10 +383,10 @@ def format_float_by_top_bottom_dig(num: float,
                                    target_top_digit: int,
                                    target_bottom_digit: int,
                                    sign_mode: SignMode) -> str:
-    num_rounded = round(num, -target_bottom_digit)
+    num_rounded = round_float(num, -target_bottom_digit)
 
     print_prec = max(0, -target_bottom_digit)
-    abs_mantissa_str = f'{abs(num_rounded):.{print_prec}f}'
+    abs_mantissa_str = f'{abs_exact(num_rounded):.{print_prec}f}'
 
     num_top_digit, _ = get_top_and_bottom_digit(num_rounded)
     pad_str = get_pad_str(num_top_digit, target_top_digit)
@@ -284,9 +464,18 @@ def parse_format_spec(fmt: str) -> FormatSpec:
     return format_spec
 
 
-def pformat_float(num: float, format_spec: FormatSpec) -> str:
-    if not isfinite(num):
-        return str(num)
+def pformat_float(num: float, format_spec: FormatSpec,
+                  exp_str_func: Callable[[int, FormatType], str]
+                  = get_exp_str) -> str:
+    """
+    num may also be a Decimal or an integer of any size, in which case the
+    digits are taken from its exact value, or a numpy float32 or float16,
+    whose digits are taken from its shortest repr, see as_exact().
+    exp_str_func builds the exponent suffix.
+    """
+    num = as_exact(num)
+    if not is_finite(num):
+        return str(float(num))
 
     prec_type = format_spec.prec_type
     prec = format_spec.precision
@@ -295,7 +484,7 @@ def pformat_float(num: float, format_spec: FormatSpec) -> str:
     sign_mode = format_spec.sign_mode
 
     mantissa, exp = get_mantissa_exp(num, format_type)
-    exp_str = get_exp_str(exp, format_type)
+    exp_str = exp_str_func(exp, format_type)
 
     top_digit, bottom_digit = get_top_and_bottom_digit(mantissa)
 
@@ -309,12 +498,77 @@ def pformat_float(num: float, format_spec: FormatSpec) -> str:
     return full_str
 
 
+def get_round_digit_array(mantissas, prec: Optional[int],
+                          prec_type: PrecType):
+    """
+    Vectorized get_round_digit() using the digit analysis of mantissas.
+    """
+    if prec is None:
+        return get_bottom_digit_array(mantissas)
+    elif prec_type is PrecType.SIG_FIG:
+        return get_top_digit_array(mantissas) - (prec - 1)
+    return np.full(np.shape(mantissas), -prec)
+
+
+def pformat_float_array(nums, format_spec: FormatSpec,
+                        monotonic: Optional[bool] = None,
+                        exp_str_func: Callable[[int, FormatType], str]
+                        = get_exp_str) -> list[str]:
+    """
+    Format every element of nums. For float64 arrays the mantissa, exponent
+    and digit analysis is vectorized. Other float dtypes, e.g. float32, are
+    formatted element by element from their shortest repr, as by
+    pformat_float(). monotonic is passed to get_mantissa_exp_array().
+    exp_str_func builds the exponent suffix and is called once per distinct
+    exponent.
+    """
+    if np is None or not isinstance(nums, np.ndarray):
+        return [pformat_float(num, format_spec, exp_str_func) for num in nums]
+    if nums.dtype == object or is_shortest_repr_float(nums):
+        return [pformat_float(num, format_spec, exp_str_func)
+                for num in np.ravel(nums)]
+
+    prec_type = format_spec.prec_type
+    prec = format_spec.precision
+    format_type = format_spec.format_type
+    top_padded_digit = format_spec.top_padded_digit
+    sign_mode = format_spec.sign_mode
+
+    nums = np.ravel(nums)
+    mantissas, exps = get_mantissa_exp_array(nums, format_type, monotonic)
+    round_digits = get_round_digit_array(mantissas, prec, prec_type)
+    finite = np.isfinite(nums)
+
+    exp_strs = {}
+    num_strs = []
+    for num, mantissa, exp, round_digit, is_finite in zip(
+            nums, mantissas, exps.tolist(), round_digits.tolist(),
+            finite.tolist()):
+        if not is_finite:
+            num_strs.append(str(num))
+            continue
+        mantissa_str = format_float_by_top_bottom_dig(
+            mantissa, top_padded_digit, round_digit, sign_mode)
+        try:
+            exp_str = exp_strs[exp]
+        except KeyError:
+            exp_str = exp_strs[exp] = exp_str_func(exp, format_type)
+        num_strs.append(f'{mantissa_str}{exp_str}')
+    return num_strs
+
+
 class pfloat(float):
     def __format__(self, format_spec):
         format_spec_data = parse_format_spec(format_spec)
         return pformat_float(self, format_spec_data)
 
 
+class pdecimal(Decimal):
+    def __format__(self, format_spec):
+        format_spec_data = parse_format_spec(format_spec)
+        return pformat_float(Decimal(self), format_spec_data)
+
+
 def main():
     num = pfloat(15000)
     fmt = '.2B'
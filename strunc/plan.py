@@ -0,0 +1,123 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+from strunc.digits import abs_exact, as_exact, is_finite, round_float
+from strunc.sig_fig_rules import SigFigRule, get_sig_fig_rule
+from strunc.strunc2 import (AUTO_SIG_FIGS, DriverType, FormatSpecData,
+                            FormatType, format_rounded_val_unc,
+                            format_val_unc, get_exp,
+                            get_top_and_bottom_digit, parse_format_spec,
+                            round_val_unc_to_sig_figs)
+
+
+@dataclass(frozen=True)
+class FormatPlan:
+    """
+    Result of the significant figure and exponent analysis of one
+    (val, unc) pair:
+    - num_sig_figs: significant figures shown for the uncertainty
+    - bottom_digit: decimal digit val and unc are rounded to
+    - exp: exponent of the output
+    - unc_bounds: open interval of uncertainties giving the same
+        num_sig_figs and bottom_digit
+    The plan can be reused for other pairs of the same uncertainty class
+    whose rounded value has the same exponent, e.g. rows of a table with
+    similar uncertainties. is_valid() checks this; apply() formats with
+    the plan and format() falls back to the full analysis if needed.
+    Build plans with FormatPlan.from_val_unc().
+    """
+    format_spec: str
+    num_sig_figs: int
+    bottom_digit: int
+    exp: int
+    unc_bounds: tuple[float, float]
+    format_spec_data: FormatSpecData = field(repr=False, compare=False)
+    sig_fig_rule: Optional[SigFigRule] = field(repr=False, compare=False)
+
+    @classmethod
+    def from_val_unc(cls, val: float, unc: float,
+                     format_spec: str = '') -> 'FormatPlan':
+        """
+        val must be finite and unc finite and non-zero.
+        """
+        val, unc = as_exact(val), as_exact(unc)
+        if not is_finite(val) or not is_finite(unc) or unc == 0:
+            raise ValueError(f'Cannot plan formatting of {val}, {unc}. val '
+                             f'must be finite and unc finite and non-zero.')
+        unc = abs_exact(unc)
+        format_spec_data = parse_format_spec(format_spec)
+        num_sig_figs = format_spec_data.num_sig_figs
+        val_rounded, unc_rounded, bottom_digit = round_val_unc_to_sig_figs(
+            val, unc, DriverType.UNCERTAINTY, num_sig_figs,
+            format_spec_data.sig_fig_rule)
+
+        if num_sig_figs == AUTO_SIG_FIGS:
+            rule = get_sig_fig_rule(format_spec_data.sig_fig_rule)
+            num_sig_figs, _, _ = rule.apply(unc)
+            unc_bounds = rule.get_unc_bounds(unc)
+        else:
+            rule = None
+            top_digit, _ = get_top_and_bottom_digit(unc)
+            unc_bounds = (10.0**top_digit * (1 + 1e-12),
+                          10.0**(top_digit + 1) * (1 - 1e-12))
+
+        exp = get_exp(val_rounded, unc_rounded, DriverType.VALUE,
+                      format_spec_data.format_type)
+        return cls(format_spec, num_sig_figs, bottom_digit, exp, unc_bounds,
+                   format_spec_data, rule)
+
+    def _get_val_rounded(self, val: float, unc: float) -> Optional[float]:
+        """
+        val rounded to the plan's bottom digit, or None if the plan does not
+        apply to (val, unc).
+        """
+        if not is_finite(val) or not is_finite(unc):
+            return None
+        low, high = self.unc_bounds
+        if not low < abs_exact(unc) < high:
+            return None
+        val_rounded = round_float(val, -self.bottom_digit)
+        format_type = self.format_spec_data.format_type
+        if format_type is not FormatType.DECIMAL:
+            exp = get_exp(val_rounded, unc, DriverType.VALUE, format_type)
+            if exp != self.exp:
+                return None
+        return val_rounded
+
+    def is_valid(self, val: float, unc: float) -> bool:
+        val, unc = as_exact(val), as_exact(unc)
+        return self._get_val_rounded(val, unc) is not None
+
+    def _format_rounded(self, val: float, unc: float,
+                        val_rounded: float) -> str:
+        unc = abs_exact(unc)
+        if self.sig_fig_rule is not None:
+            # The rule's own rounding, which for e.g. 0.0996 under the PDG
+            # rule goes via the leading digits 996 to 0.10 rather than 0.09.
+            _, unc, _ = self.sig_fig_rule.apply(unc)
+        unc_rounded = round_float(unc, -self.bottom_digit)
+        return format_rounded_val_unc(
+            val, val_rounded, unc_rounded, self.bottom_digit, self.exp,
+            self.format_spec_data, self.format_spec_data.short_form)
+
+    def apply(self, val: float, unc: float) -> str:
+        """
+        Format (val, unc) with the plan, skipping the significant figure
+        and exponent analysis. Raises ValueError if the plan does not apply.
+        """
+        val, unc = as_exact(val), as_exact(unc)
+        val_rounded = self._get_val_rounded(val, unc)
+        if val_rounded is None:
+            raise ValueError(f'{self} does not apply to {val}, {unc}.')
+        return self._format_rounded(val, unc, val_rounded)
+
+    def format(self, val: float, unc: float) -> str:
+        """
+        apply() if the plan applies to (val, unc), otherwise format with
+        the full analysis.
+        """
+        val, unc = as_exact(val), as_exact(unc)
+        val_rounded = self._get_val_rounded(val, unc)
+        if val_rounded is None:
+            return format_val_unc(val, unc, self.format_spec_data)
+        return self._format_rounded(val, unc, val_rounded)
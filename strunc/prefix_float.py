@@ -1,6 +1,10 @@
 import re
+from functools import lru_cache
+from typing import Callable
 
 from strunc import pfloat
+from strunc.pformat_float import (FormatType, get_exp_str, parse_format_spec,
+                                  pformat_float)
 
 
 si_val_to_prefix_dict = {30: 'Q',
@@ -37,10 +41,13 @@ iec_val_to_prefix_dict = {0: '',
 def replace_prefix(num_str: str):
     match = re.match(r'''
                          ^
-                         (?P<mantissa>\d+\.?\d*)
+                         (?P<mantissa>[-+ ]?\d+\.?\d*)
                          ((?P<exp_type>[be])(?P<exp_val>[+-]?\d+))?
                          $
                       ''', num_str, re.VERBOSE)
+    if match is None:
+        # nan and inf
+        return num_str
 
     mantissa = match.group('mantissa')
     exp_type = match.group('exp_type')
@@ -60,6 +67,43 @@ def replace_prefix(num_str: str):
         return num_str
 
 
+def get_prefix_exp_str(exp: int, format_type: FormatType) -> str:
+    """
+    Exponent suffix with the SI or IEC prefix of exp where there is one,
+    matching replace_prefix() applied to the pfloat string.
+    """
+    exp_str = get_exp_str(exp, format_type)
+    if not exp_str:
+        return exp_str
+    if exp_str[0] == 'e':
+        val_to_prefix_dict = si_val_to_prefix_dict
+    else:
+        val_to_prefix_dict = iec_val_to_prefix_dict
+    try:
+        return f' {val_to_prefix_dict[exp]}'
+    except KeyError:
+        return exp_str
+
+
+@lru_cache(maxsize=256)
+def compile_format_spec(format_spec: str) -> Callable[[float], str]:
+    """
+    Parse a pfloat or prefix_float format spec once and return a function
+    formatting a single number with it.
+    """
+    if format_spec.endswith('p'):
+        format_spec_data = parse_format_spec(format_spec[:-1])
+
+        def formatter(num) -> str:
+            return replace_prefix(pformat_float(num, format_spec_data))
+    else:
+        format_spec_data = parse_format_spec(format_spec)
+
+        def formatter(num) -> str:
+            return pformat_float(num, format_spec_data)
+    return formatter
+
+
 class prefix_float(float):
     def __format__(self, format_spec: str):
         pfloat_num = pfloat(self)
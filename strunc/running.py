@@ -0,0 +1,178 @@
+from math import log10, nan, sqrt
+from typing import Iterable, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from strunc.digits import is_finite, is_nan
+from strunc.strunc2 import (DriverType, FormatType, compile_format_spec,
+                            get_exp, get_sig_fig_driver, parse_format_spec,
+                            round_val_unc_to_sig_figs)
+
+
+def same_key(key_1: Optional[tuple], key_2: Optional[tuple]) -> bool:
+    if key_1 is None or key_2 is None:
+        return key_1 is key_2
+    return all(x == y or is_nan(x) and is_nan(y)
+               for x, y in zip(key_1, key_2))
+
+
+class RunningValUnc:
+    """
+    Online mean and variance (Welford's algorithm) displayed as a formatted
+    val +/- unc string. unc_mode selects the standard error of the mean
+    ('sem') or the sample standard deviation ('std') as the uncertainty.
+
+    The string is only re-rendered when the displayed digits change, i.e.
+    when the rounded value, the rounded uncertainty or the exponent differ
+    from the last render. For engineering format types exp_hysteresis, in
+    decades, keeps the current exponent until the value has moved that far
+    past the edge of the exponent's range, so values hovering around e.g. 1e3
+    don't flip between k and unitless output.
+    """
+    def __init__(self, format_spec: str = '', unc_mode: str = 'sem',
+                 exp_hysteresis: float = 0):
+        if unc_mode not in ('sem', 'std'):
+            raise ValueError(f'unc_mode must be \'sem\' or \'std\', got '
+                             f'{unc_mode}.')
+        self.format_spec = format_spec
+        self.unc_mode = unc_mode
+        self.exp_hysteresis = exp_hysteresis
+        self.count = 0
+        self.mean = nan
+        self._m2 = 0.0
+
+        self._format_spec_data = parse_format_spec(format_spec)
+        self._formatter = compile_format_spec(format_spec)
+        self._key = None
+        self._exp = None
+        self._str = ''
+        self.render_count = 0
+
+    def update(self, num: float):
+        num = float(num)
+        self.count += 1
+        if self.count == 1:
+            self.mean = num
+            return
+        delta = num - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (num - self.mean)
+
+    def update_many(self, nums: Iterable[float]):
+        """
+        Add many samples. numpy arrays are reduced in one pass and merged
+        with Chan's parallel update.
+        """
+        if np is not None and isinstance(nums, np.ndarray):
+            nums = np.asarray(nums, dtype=float).ravel()
+            if nums.size == 0:
+                return
+            mean = float(nums.mean())
+            m2 = float(((nums - mean)**2).sum())
+            self._merge(nums.size, mean, m2)
+        else:
+            for num in nums:
+                self.update(num)
+
+    def merge(self, other: 'RunningValUnc'):
+        """
+        Add the samples accumulated by other, e.g. in another worker.
+        """
+        if other.count:
+            self._merge(other.count, other.mean, other._m2)
+
+    def _merge(self, count: int, mean: float, m2: float):
+        if self.count == 0:
+            self.count, self.mean, self._m2 = count, mean, m2
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self._m2 += m2 + delta**2 * self.count * count / total
+        self.count = total
+
+    @property
+    def variance(self) -> float:
+        if self.count < 2:
+            return nan
+        return self._m2 / (self.count - 1)
+
+    @property
+    def std(self) -> float:
+        return sqrt(self.variance)
+
+    @property
+    def sem(self) -> float:
+        return self.std / sqrt(self.count) if self.count else nan
+
+    @property
+    def unc(self) -> float:
+        return self.sem if self.unc_mode == 'sem' else self.std
+
+    def _get_exp(self, val_rounded: float) -> int:
+        format_type = self._format_spec_data.format_type
+        exp_driver = (DriverType.VALUE if is_finite(val_rounded)
+                      else DriverType.NONE)
+        exp = get_exp(val_rounded, nan, exp_driver, format_type)
+        if (self._exp is None or exp == self._exp or not self.exp_hysteresis
+                or exp_driver is DriverType.NONE or val_rounded == 0):
+            return exp
+
+        if format_type is FormatType.ENGINEERING:
+            low = self._exp
+        elif format_type is FormatType.ENGINEERING_UPPER:
+            low = self._exp - 1
+        else:
+            return exp
+        log_val = log10(abs(val_rounded))
+        hysteresis = self.exp_hysteresis
+        if low - hysteresis <= log_val < low + 3 + hysteresis:
+            return self._exp
+        return exp
+
+    def get_key(self) -> tuple:
+        """
+        (rounded value, rounded uncertainty, bottom digit, exponent), i.e.
+        everything that determines the displayed string.
+        """
+        val, unc = self.mean, self.unc
+        format_spec_data = self._format_spec_data
+        val_rounded, unc_rounded, bottom_digit = round_val_unc_to_sig_figs(
+            val, unc, get_sig_fig_driver(val, unc),
+            format_spec_data.num_sig_figs, format_spec_data.sig_fig_rule)
+        return val_rounded, unc_rounded, bottom_digit, self._get_exp(
+            val_rounded)
+
+    @property
+    def changed(self) -> bool:
+        return not same_key(self.get_key(), self._key)
+
+    def poll(self) -> Optional[str]:
+        """
+        Return the formatted string if it changed since the last render,
+        otherwise None.
+        """
+        key = self.get_key()
+        if same_key(key, self._key):
+            return None
+        self._key = key
+        self._exp = key[3]
+        self._str = self._formatter(self.mean, self.unc, exp=self._exp)
+        self.render_count += 1
+        return self._str
+
+    def __str__(self):
+        self.poll()
+        return self._str
+
+    def __format__(self, format_spec: str) -> str:
+        if not format_spec:
+            return str(self)
+        return compile_format_spec(format_spec)(self.mean, self.unc)
+
+    def __repr__(self):
+        return (f'{self.__class__.__name__}(count={self.count}, '
+                f'mean={self.mean}, unc={self.unc})')
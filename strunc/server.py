@@ -0,0 +1,302 @@
+"""
+Formatting server for clients that want to format large batches of numbers
+without paying process start-up or per-call overhead.
+
+Every message is a 4 byte big-endian length followed by that many bytes.
+Requests start with a kind byte:
+    b'f' <spec> <n> <n float64>              pfloat/prefix_float spec
+    b'v' <spec> <n> <n float64> * 2          val, unc
+    b'u' <spec> <n> <n float64> * 3          val, unc, unc_2
+    b's'                                     server statistics
+where <spec> is a 2 byte length followed by the utf-8 spec, <n> a 4 byte
+count and floats are little-endian. Responses start with a status byte,
+0 for success followed by <n> and n (2 byte length, utf-8 string) pairs
+packed as all lengths then all strings, or by utf-8 JSON for statistics,
+and 1 for errors followed by the utf-8 error message. Connections stay
+open for any number of requests. Messages longer than the server's
+max_message_size get an error response and the connection is closed.
+"""
+import array
+import asyncio
+from collections import deque
+import json
+import socket
+import struct
+import sys
+import time
+from typing import Iterable, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from strunc.batch import format_batch, format_val_unc_batch
+
+
+LENGTH = struct.Struct('!I')
+SPEC_LENGTH = struct.Struct('!H')
+COUNT = struct.Struct('!I')
+
+KIND_NUM_ARRAYS = {b'f': 1, b'v': 2, b'u': 3}
+STATUS_OK = 0
+STATUS_ERROR = 1
+MAX_MESSAGE_SIZE = 64 * 2**20
+MAX_STR_LENGTH = 2**16 - 1
+
+
+def pack_floats(nums: Iterable[float]) -> bytes:
+    if np is not None and isinstance(nums, np.ndarray):
+        return np.asarray(nums, dtype='<f8').tobytes()
+    floats = array.array('d', nums)
+    if sys.byteorder == 'big':
+        floats.byteswap()
+    return floats.tobytes()
+
+
+def unpack_floats(data: bytes):
+    if np is not None:
+        return np.frombuffer(data, dtype='<f8').astype(float)
+    floats = array.array('d')
+    floats.frombytes(data)
+    if sys.byteorder == 'big':
+        floats.byteswap()
+    return floats.tolist()
+
+
+def pack_request(kind: bytes, format_spec: str = '',
+                 arrays: tuple = ()) -> bytes:
+    spec_bytes = format_spec.encode()
+    parts = [kind, SPEC_LENGTH.pack(len(spec_bytes)), spec_bytes]
+    packed_arrays = [pack_floats(nums) for nums in arrays]
+    if packed_arrays:
+        parts.append(COUNT.pack(len(packed_arrays[0]) // 8))
+        parts.extend(packed_arrays)
+    return b''.join(parts)
+
+
+def unpack_request(payload: bytes) -> tuple[bytes, str, list]:
+    kind = payload[:1]
+    spec_len, = SPEC_LENGTH.unpack_from(payload, 1)
+    offset = 1 + SPEC_LENGTH.size
+    format_spec = payload[offset:offset + spec_len].decode()
+    offset += spec_len
+    if kind not in KIND_NUM_ARRAYS:
+        return kind, format_spec, []
+
+    count, = COUNT.unpack_from(payload, offset)
+    offset += COUNT.size
+    size = 8 * count
+    num_arrays = KIND_NUM_ARRAYS[kind]
+    if len(payload) != offset + num_arrays * size:
+        raise ValueError(f'Expected {num_arrays} arrays of {count} floats.')
+    arrays = [unpack_floats(payload[offset + i * size:
+                                    offset + (i + 1) * size])
+              for i in range(num_arrays)]
+    return kind, format_spec, arrays
+
+
+def pack_strs(strs: list[str]) -> bytes:
+    encoded = [num_str.encode() for num_str in strs]
+    max_length = max(map(len, encoded), default=0)
+    if max_length > MAX_STR_LENGTH:
+        raise ValueError(f'Formatted string of {max_length} bytes exceeds '
+                         f'the limit of {MAX_STR_LENGTH} bytes.')
+    lengths = struct.pack(f'!{len(encoded)}H', *map(len, encoded))
+    return b''.join([bytes([STATUS_OK]), COUNT.pack(len(encoded)), lengths,
+                     *encoded])
+
+
+def unpack_strs(payload: bytes) -> list[str]:
+    count, = COUNT.unpack_from(payload, 1)
+    offset = 1 + COUNT.size
+    lengths = struct.unpack_from(f'!{count}H', payload, offset)
+    offset += 2 * count
+    strs = []
+    for length in lengths:
+        strs.append(payload[offset:offset + length].decode())
+        offset += length
+    return strs
+
+
+class ServerStats:
+    """
+    Request, row and byte counters plus the latencies of the most recent
+    requests for p50/p99 estimates.
+    """
+    def __init__(self, max_latencies: int = 10000):
+        self.start_time = time.perf_counter()
+        self.num_requests = 0
+        self.num_rows = 0
+        self.num_bytes = 0
+        self.num_errors = 0
+        self.num_connections = 0
+        self.latencies = deque(maxlen=max_latencies)
+
+    def record(self, num_rows: int, num_bytes: int, latency: float):
+        self.num_requests += 1
+        self.num_rows += num_rows
+        self.num_bytes += num_bytes
+        self.latencies.append(latency)
+
+    def snapshot(self) -> dict:
+        uptime = time.perf_counter() - self.start_time
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction):
+            if not latencies:
+                return None
+            idx = min(int(fraction * len(latencies)), len(latencies) - 1)
+            return 1e3 * latencies[idx]
+
+        return {'uptime_s': uptime,
+                'connections': self.num_connections,
+                'requests': self.num_requests,
+                'errors': self.num_errors,
+                'rows': self.num_rows,
+                'bytes': self.num_bytes,
+                'rows_per_s': self.num_rows / uptime if uptime > 0 else 0,
+                'requests_per_s': (self.num_requests / uptime
+                                   if uptime > 0 else 0),
+                'p50_ms': percentile(0.5),
+                'p99_ms': percentile(0.99)}
+
+
+def format_request(kind: bytes, format_spec: str, arrays: list) -> list[str]:
+    if kind == b'f':
+        return format_batch(arrays[0], format_spec)
+    return format_val_unc_batch(arrays[0], arrays[1], format_spec,
+                                *arrays[2:])
+
+
+class FormatServer:
+    def __init__(self, max_message_size: int = MAX_MESSAGE_SIZE):
+        self.max_message_size = max_message_size
+        self.stats = ServerStats()
+
+    async def handle_request(self, payload: bytes) -> bytes:
+        start = time.perf_counter()
+        try:
+            kind, format_spec, arrays = unpack_request(payload)
+            if kind == b's':
+                return bytes([STATUS_OK]) + json.dumps(
+                    self.stats.snapshot()).encode()
+            if kind not in KIND_NUM_ARRAYS:
+                raise ValueError(f'Unknown request kind {kind!r}.')
+            loop = asyncio.get_running_loop()
+            strs = await loop.run_in_executor(None, format_request, kind,
+                                              format_spec, arrays)
+            response = pack_strs(strs)
+        except Exception as exc:
+            return self.error_response(exc)
+        self.stats.record(len(strs), len(payload) + len(response),
+                          time.perf_counter() - start)
+        return response
+
+    def error_response(self, exc: Exception) -> bytes:
+        self.stats.num_errors += 1
+        return bytes([STATUS_ERROR]) + str(exc).encode()
+
+    async def handle_connection(self, reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter):
+        self.stats.num_connections += 1
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(LENGTH.size)
+                except asyncio.IncompleteReadError:
+                    break
+                length, = LENGTH.unpack(header)
+                if length > self.max_message_size:
+                    response = self.error_response(ValueError(
+                        f'Message of {length} bytes exceeds the limit of '
+                        f'{self.max_message_size} bytes.'))
+                    writer.write(LENGTH.pack(len(response)) + response)
+                    await writer.drain()
+                    break
+                payload = await reader.readexactly(length)
+                response = await self.handle_request(payload)
+                writer.write(LENGTH.pack(len(response)) + response)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.stats.num_connections -= 1
+            writer.close()
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0,
+                    unix_path: Optional[str] = None) -> asyncio.Server:
+        if unix_path is not None:
+            return await asyncio.start_unix_server(self.handle_connection,
+                                                   unix_path)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+async def serve(host: str = '127.0.0.1', port: int = 8765,
+                unix_path: Optional[str] = None,
+                max_message_size: int = MAX_MESSAGE_SIZE):
+    server = await FormatServer(max_message_size).start(host, port,
+                                                        unix_path)
+    async with server:
+        await server.serve_forever()
+
+
+class FormatClient:
+    """
+    Blocking client holding one persistent connection to a FormatServer.
+    """
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765,
+                 unix_path: Optional[str] = None):
+        if unix_path is not None:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(unix_path)
+        else:
+            self.sock = socket.create_connection((host, port))
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _recv_exactly(self, size: int) -> bytes:
+        chunks = []
+        while size:
+            chunk = self.sock.recv(size)
+            if not chunk:
+                raise ConnectionError('Server closed the connection.')
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+
+    def request(self, payload: bytes) -> bytes:
+        self.sock.sendall(LENGTH.pack(len(payload)) + payload)
+        length, = LENGTH.unpack(self._recv_exactly(LENGTH.size))
+        response = self._recv_exactly(length)
+        if response[0] == STATUS_ERROR:
+            raise ValueError(response[1:].decode())
+        return response
+
+    def format(self, nums: Iterable[float],
+               format_spec: str = '') -> list[str]:
+        return unpack_strs(self.request(
+            pack_request(b'f', format_spec, (nums,))))
+
+    def format_val_unc(self, vals: Iterable[float], uncs: Iterable[float],
+                       format_spec: str = '',
+                       uncs_2: Optional[Iterable[float]] = None
+                       ) -> list[str]:
+        arrays = (vals, uncs)
+        kind = b'v'
+        if uncs_2 is not None:
+            arrays += (uncs_2,)
+            kind = b'u'
+        return unpack_strs(self.request(pack_request(kind, format_spec,
+                                                     arrays)))
+
+    def stats(self) -> dict:
+        return json.loads(self.request(pack_request(b's'))[1:])
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
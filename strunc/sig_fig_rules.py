@@ -0,0 +1,386 @@
+from dataclasses import dataclass, field
+from math import floor, log10, isfinite
+from decimal import Decimal
+from typing import Callable, Union
+import logging
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from strunc.digits import round_decimal, mul_pow10
+
+
+logger = logging.getLogger(__name__)
+
+LEAD_MIN = 100
+LEAD_MAX = 999
+
+
+def scale_pow10(num: Union[int, float], exp: int) -> float:
+    """
+    Multiply num by 10**exp. Negative exponents divide by the exact integer
+    power of ten so that e.g. 35 * 10**-2 gives 0.35 rather than
+    0.35000000000000003.
+    """
+    if exp >= 0:
+        return float(num * 10**exp)
+    else:
+        return num / 10**-exp
+
+
+def get_lead(num: float, top_digit: int) -> int:
+    """
+    Three leading digits of num. round() rounds on the exact decimal value
+    of num so ties are resolved the same way as round(num, ndigits).
+    """
+    return round(scale_pow10(round(num, 2 - top_digit), 2 - top_digit))
+
+
+@dataclass
+class SigFigRule:
+    """
+    Lookup table mapping the three leading digits (100-999) of an
+    uncertainty to
+    - the number of significant figures to display
+    - the number of leading digits the uncertainty is rounded to
+    If rounding carries into the next decade (e.g. 0.96 rounded to one digit
+    gives 1.0) the significant figures are counted from the new top digit.
+    With round_lead, as in the PDG convention, the carry is decided by
+    rounding the three leading digits, so 0.0995 rounded to one digit gives
+    0.1. Otherwise it is decided by rounding the uncertainty itself, so
+    0.99451 rounded to two digits gives 0.99 as for a '.2' format spec.
+    Build rules with SigFigRule.from_func() and make them available by name
+    with register_sig_fig_rule().
+    """
+    name: str
+    num_sig_figs_table: tuple[int, ...]
+    round_digits_table: tuple[int, ...]
+    carry_table: tuple[bool, ...]
+    round_lead: bool = False
+    _arrays: tuple = field(default=None, init=False, repr=False,
+                           compare=False)
+
+    @classmethod
+    def from_func(cls, name: str, func: Callable[[int], tuple[int, int]],
+                  round_lead: bool = False) -> 'SigFigRule':
+        """
+        func maps the three leading digits to
+        (num_sig_figs, num_round_digits). carry_table records the leads
+        for which every uncertainty carries.
+        """
+        num_sig_figs_list = []
+        round_digits_list = []
+        carry_list = []
+        for lead in range(LEAD_MIN, LEAD_MAX + 1):
+            num_sig_figs, round_digits = func(lead)
+            if num_sig_figs < 1:
+                raise ValueError(f'Rule {name} returned {num_sig_figs} '
+                                 f'significant figures for {lead}.')
+            if not 1 <= round_digits <= 3:
+                raise ValueError(f'Rule {name} returned {round_digits} '
+                                 f'round digits for {lead}.')
+            num_sig_figs_list.append(num_sig_figs)
+            round_digits_list.append(round_digits)
+            if round_lead:
+                round_scale = 10**(3 - round_digits)
+                rounded_lead = (lead + round_scale // 2) // round_scale
+                carry_list.append(rounded_lead >= 10**round_digits)
+            else:
+                carry_list.append(
+                    2 * lead - 1 >= get_twice_carry_lead(round_digits))
+        return cls(name, tuple(num_sig_figs_list), tuple(round_digits_list),
+                   tuple(carry_list), round_lead)
+
+    def apply(self, unc):
+        """
+        Return (num_sig_figs, rounded_unc, top_digit) where top_digit is the
+        top digit of rounded_unc. unc may be a float or a numpy array. For
+        arrays, entries which are zero or not finite get 0 significant
+        figures, are returned unrounded and have top digit 0; all other
+        entries give the same result as for a float.
+        """
+        if np is not None and isinstance(unc, np.ndarray):
+            return self._apply_array(unc)
+        if isinstance(unc, Decimal):
+            return self._apply_decimal(unc)
+
+        unc = abs(float(unc))
+        lead, top_digit = self._get_lead(unc)
+
+        idx = lead - LEAD_MIN
+        num_sig_figs = self.num_sig_figs_table[idx]
+        round_exp = self.round_digits_table[idx] - 1 - top_digit
+        rounded_unc = round(unc, round_exp)
+        if self.round_lead:
+            carry = self.carry_table[idx]
+        else:
+            carry = rounded_unc >= scale_pow10(1, top_digit + 1)
+        if carry:
+            top_digit += 1
+            rounded_unc = scale_pow10(1, top_digit)
+        return num_sig_figs, rounded_unc, top_digit
+
+    def _get_lead(self, unc: float) -> tuple[int, int]:
+        if not isfinite(unc) or unc == 0:
+            raise ValueError(f'Unable to parse number of sig figs from {unc}.')
+
+        top_digit = floor(log10(unc))
+        lead = get_lead(unc, top_digit)
+        if lead > LEAD_MAX:
+            top_digit += 1
+            lead = get_lead(unc, top_digit)
+        elif lead < LEAD_MIN:
+            top_digit -= 1
+            lead = get_lead(unc, top_digit)
+        return lead, top_digit
+
+    def _is_split(self, idx: int) -> bool:
+        """
+        Whether only part of the uncertainties with this lead carry, which
+        happens without round_lead, e.g. 0.9945 and 0.9951 rounded to two
+        digits.
+        """
+        if self.round_lead:
+            return False
+        twice_carry_lead = get_twice_carry_lead(self.round_digits_table[idx])
+        return 2 * LEAD_MIN + 2 * idx - 1 < twice_carry_lead < (
+            2 * LEAD_MIN + 2 * idx + 1)
+
+    def _get_class(self, lead: int, top_digit: int):
+        idx = lead - LEAD_MIN
+        if self._is_split(idx):
+            return None
+        return (self.num_sig_figs_table[idx],
+                top_digit + self.carry_table[idx])
+
+    def get_unc_bounds(self, unc: float) -> tuple[float, float]:
+        """
+        Open interval (low, high) around unc in which every uncertainty
+        gives the same number of significant figures and rounded top digit,
+        and hence rounds at the same digit. The bounds are pulled in by a
+        relative 1e-12 so uncertainties on a rounding tie are excluded.
+        """
+        unc = abs(float(unc))
+        lead, top_digit = self._get_lead(unc)
+        unc_class = self._get_class(lead, top_digit)
+        if unc_class is None:
+            # Only the part of the lead on the same side of the carry is
+            # returned.
+            idx = lead - LEAD_MIN
+            twice_carry_lead = get_twice_carry_lead(
+                self.round_digits_table[idx])
+            if self.apply(unc)[2] > top_digit:
+                low_twice, high_twice = twice_carry_lead, 2 * lead + 1
+            else:
+                low_twice, high_twice = 2 * lead - 1, twice_carry_lead
+            low = scale_pow10(low_twice, top_digit - 2) / 2
+            high = scale_pow10(high_twice, top_digit - 2) / 2
+            return low * (1 + 1e-12), high * (1 - 1e-12)
+
+        def prev_lead(lead, top_digit):
+            if lead > LEAD_MIN:
+                return lead - 1, top_digit
+            return LEAD_MAX, top_digit - 1
+
+        def next_lead(lead, top_digit):
+            if lead < LEAD_MAX:
+                return lead + 1, top_digit
+            return LEAD_MIN, top_digit + 1
+
+        low_lead, low_top_digit = prev_lead(lead, top_digit)
+        while self._get_class(low_lead, low_top_digit) == unc_class:
+            low_lead, low_top_digit = prev_lead(low_lead, low_top_digit)
+        high_lead, high_top_digit = lead, top_digit
+        while self._get_class(*next_lead(high_lead,
+                                         high_top_digit)) == unc_class:
+            high_lead, high_top_digit = next_lead(high_lead, high_top_digit)
+
+        low = scale_pow10(2 * low_lead + 1, low_top_digit - 2) / 2
+        high = scale_pow10(2 * high_lead + 1, high_top_digit - 2) / 2
+        return low * (1 + 1e-12), high * (1 - 1e-12)
+
+    def _apply_decimal(self, unc: Decimal):
+        unc = unc.copy_abs()
+        if not unc.is_finite() or unc == 0:
+            raise ValueError(f'Unable to parse number of sig figs from {unc}.')
+
+        top_digit = unc.adjusted()
+        lead = int(mul_pow10(round_decimal(unc, 2 - top_digit), 2 - top_digit))
+        if lead > LEAD_MAX:
+            top_digit += 1
+            lead = int(mul_pow10(round_decimal(unc, 2 - top_digit),
+                                 2 - top_digit))
+
+        idx = lead - LEAD_MIN
+        num_sig_figs = self.num_sig_figs_table[idx]
+        round_exp = self.round_digits_table[idx] - 1 - top_digit
+        rounded_unc = round_decimal(unc, round_exp)
+        if self.round_lead:
+            carry = self.carry_table[idx]
+        else:
+            carry = rounded_unc >= Decimal(1).scaleb(top_digit + 1)
+        if carry:
+            top_digit += 1
+            rounded_unc = Decimal(1).scaleb(top_digit)
+        return num_sig_figs, rounded_unc, top_digit
+
+    def _get_arrays(self):
+        if self._arrays is None:
+            self._arrays = (np.array(self.num_sig_figs_table, dtype=np.int64),
+                            np.array(self.round_digits_table, dtype=np.int64),
+                            np.array(self.carry_table, dtype=bool))
+        return self._arrays
+
+    def _apply_array(self, unc):
+        num_sig_figs_arr, round_digits_arr, carry_arr = self._get_arrays()
+
+        unc = np.abs(np.asarray(unc, dtype=float))
+        valid = np.isfinite(unc) & (unc != 0)
+        safe_unc = np.where(valid, unc, 1.0)
+
+        top_digit = np.floor(np.log10(safe_unc)).astype(np.int64)
+        scaled_lead = scale_pow10_array(safe_unc, 2 - top_digit)
+        lead = np.rint(scaled_lead)
+        top_digit += lead > LEAD_MAX
+        top_digit -= lead < LEAD_MIN
+        scaled_lead = scale_pow10_array(safe_unc, 2 - top_digit)
+        lead = np.rint(scaled_lead).astype(np.int64)
+
+        idx = np.clip(lead, LEAD_MIN, LEAD_MAX) - LEAD_MIN
+        num_sig_figs = np.where(valid, num_sig_figs_arr[idx], 0)
+        round_digits = round_digits_arr[idx]
+        round_exp = round_digits - 1 - top_digit
+        scaled_unc = scale_pow10_array(safe_unc, round_exp)
+        rounded_int = np.rint(scaled_unc)
+        if self.round_lead:
+            carry = carry_arr[idx]
+            unc_tie = ~carry & is_near_tie(scaled_unc)
+        else:
+            carry = rounded_int >= POW10[round_digits]
+            unc_tie = is_near_tie(scaled_unc)
+        top_digit += carry
+        round_exp = np.where(carry, -top_digit, round_exp)
+        rounded_int = np.where(carry, 1.0, rounded_int)
+        rounded_unc = np.where(
+            valid, scale_pow10_array(rounded_int, -round_exp), unc)
+        top_digit = np.where(valid, top_digit, 0)
+
+        # rint() rounds the scaled float while apply() rounds the exact
+        # decimal value, e.g. 0.65 * 10 is exactly 6.5 but 0.65 is
+        # slightly above 0.65. The two only differ near a rounding tie, or
+        # where the powers of ten are not exact doubles, so those entries
+        # are redone with the scalar path.
+        redo = valid & (is_near_tie(scaled_lead) | unc_tie
+                        | (np.abs(top_digit) > 19))
+        for i in np.flatnonzero(redo):
+            num_sig_figs.flat[i], rounded_unc.flat[i], top_digit.flat[i] = (
+                self.apply(float(unc.flat[i])))
+        return num_sig_figs, rounded_unc, top_digit
+
+
+def get_twice_carry_lead(round_digits: int) -> int:
+    """
+    Twice the three leading digits at and above which rounding to
+    round_digits carries into the next decade, e.g. 1990 for two digits
+    since 99.5 rounds to 100.
+    """
+    return (2 * 10**round_digits - 1) * 10**(3 - round_digits)
+
+
+def is_near_tie(scaled):
+    """
+    Whether scaled is within rounding error of a tie between integers.
+    """
+    return np.abs(scaled - np.floor(scaled) - 0.5) < 1e-9 * np.maximum(
+        np.abs(scaled), 1)
+
+
+def round_float_array(nums, ndigits):
+    """
+    Vectorized round(num, ndigits) for float64 nums, which rounds on the
+    exact decimal value of num. Entries near a rounding tie, or where the
+    powers of ten are not exact doubles, are rounded with round().
+    """
+    nums = np.asarray(nums, dtype=float)
+    ndigits = np.broadcast_to(ndigits, nums.shape)
+    with np.errstate(over='ignore', invalid='ignore'):
+        scaled = scale_pow10_array(nums, ndigits)
+        rounded = scale_pow10_array(np.rint(scaled), -ndigits)
+        redo = (is_near_tie(scaled) | (np.abs(ndigits) > 22)
+                | ~(np.abs(scaled) < 2**52))
+    for i in np.flatnonzero(redo & np.isfinite(nums)):
+        rounded.flat[i] = round(float(nums.flat[i]), int(ndigits.flat[i]))
+    return np.where(np.isfinite(nums), rounded, nums)
+
+
+if np is not None:
+    # float(10**k) is the correctly rounded power of ten, which np.power()
+    # is not, e.g. np.power(10.0, -5.0) gives 9.999999999999999e-06.
+    POW10 = np.array([float(10**k) for k in range(309)] + [np.inf])
+
+
+def scale_pow10_array(num, exp):
+    """
+    Vectorized scale_pow10() giving the same result for floats. Powers of
+    ten up to 1e22 are exact doubles so dividing by them rounds once.
+    """
+    exp = np.asarray(exp)
+    pow10 = POW10[np.minimum(np.abs(exp), len(POW10) - 1)]
+    num, exp, pow10 = np.broadcast_arrays(num, exp, pow10)
+    scaled = np.divide(num, pow10, dtype=float)
+    np.multiply(num, pow10, out=scaled, where=exp >= 0)
+    return scaled
+
+
+sig_fig_rules: dict[str, SigFigRule] = {}
+
+
+def register_sig_fig_rule(rule: SigFigRule) -> SigFigRule:
+    if rule.name in sig_fig_rules:
+        logger.warning(f'Overwriting sig fig rule {rule.name}.')
+    sig_fig_rules[rule.name] = rule
+    return rule
+
+
+def get_sig_fig_rule(rule: Union[str, SigFigRule]) -> SigFigRule:
+    if isinstance(rule, SigFigRule):
+        return rule
+    try:
+        return sig_fig_rules[rule]
+    except KeyError:
+        raise ValueError(f'Unknown sig fig rule {rule}. Available rules are '
+                         f'{list(sig_fig_rules)}.') from None
+
+
+def pdg_rule_func(lead: int) -> tuple[int, int]:
+    if lead <= 354:
+        return 2, 2
+    elif lead <= 949:
+        return 1, 1
+    else:
+        return 2, 1
+
+
+def fixed_2_rule_func(lead: int) -> tuple[int, int]:
+    return 2, 2
+
+
+def one_unless_leading_one_rule_func(lead: int) -> tuple[int, int]:
+    if lead < 200:
+        return 2, 2
+    elif lead < 950:
+        return 1, 1
+    else:
+        return 2, 1
+
+
+pdg_rule = register_sig_fig_rule(
+    SigFigRule.from_func('pdg', pdg_rule_func, round_lead=True))
+fixed_2_rule = register_sig_fig_rule(
+    SigFigRule.from_func('fixed_2', fixed_2_rule_func))
+one_unless_leading_one_rule = register_sig_fig_rule(
+    SigFigRule.from_func('one_unless_leading_one',
+                         one_unless_leading_one_rule_func,
+                         round_lead=True))
@@ -0,0 +1,74 @@
+from typing import Iterator, Mapping, Union
+
+import numpy as np
+
+from strunc.batch import format_batch, format_val_unc_batch
+
+
+FieldKey = Union[str, tuple[str, ...]]
+
+
+def get_out_name(key: FieldKey) -> str:
+    if isinstance(key, str):
+        return key
+    return key[0]
+
+
+def format_field(arr: np.ndarray, key: FieldKey,
+                 format_spec: str) -> list[str]:
+    """
+    Format one output column. key is a field name formatted with a pfloat or
+    prefix_float spec, or a (val, unc) or (val, unc, unc_2) tuple of field
+    names formatted with a format_val_unc spec. float64 fields take the
+    vectorized pformat_float_array() and format_val_unc_array() paths.
+    """
+    if isinstance(key, str):
+        return format_batch(arr[key], format_spec)
+    if not 2 <= len(key) <= 3:
+        raise ValueError(f'Expected a field name or a (val, unc[, unc_2]) '
+                         f'tuple of field names, got {key}.')
+    columns = [arr[name] for name in key]
+    return format_val_unc_batch(columns[0], columns[1], format_spec,
+                                *columns[2:])
+
+
+def format_structured(arr: np.ndarray,
+                      field_specs: Mapping[FieldKey, str]) -> np.ndarray:
+    """
+    Format the fields of a structured array column by column and return a
+    structured array of fixed-width strings. field_specs maps a field name,
+    or a (val, unc[, unc_2]) tuple of field names, to its format spec. The
+    output field is named after the (val) field and is as wide as its
+    longest entry.
+    """
+    arr = np.asarray(arr)
+    columns = {}
+    for key, format_spec in field_specs.items():
+        name = get_out_name(key)
+        if name in columns:
+            raise ValueError(f'More than one field spec gives output '
+                             f'field {name!r}.')
+        columns[name] = format_field(arr, key, format_spec)
+    dtype = [(name, f'U{max(map(len, column), default=1)}')
+             for name, column in columns.items()]
+    out = np.empty(arr.shape, dtype=dtype)
+    for name, column in columns.items():
+        out[name] = np.array(column, dtype=out.dtype[name]).reshape(arr.shape)
+    return out
+
+
+def iter_structured_rows(arr: np.ndarray,
+                         field_specs: Mapping[FieldKey, str],
+                         chunk_size: int = 4096
+                         ) -> Iterator[tuple[str, ...]]:
+    """
+    Format a 1-d structured array as in format_structured() but yield rows
+    of formatted strings, formatting chunk_size rows at a time so that only
+    one chunk of strings is held in memory.
+    """
+    arr = np.asarray(arr)
+    for start in range(0, len(arr), chunk_size):
+        chunk = arr[start:start + chunk_size]
+        columns = [format_field(chunk, key, format_spec)
+                   for key, format_spec in field_specs.items()]
+        yield from zip(*columns)
@@ -1,12 +1,25 @@
 import sys
-from math import log10, floor
+from math import log10, floor, inf
+from decimal import Decimal
 import re
-from typing import Optional
+from typing import Optional, Callable
 from dataclasses import dataclass
 from enum import Enum
+from functools import lru_cache
 import logging
 
-# import numpy as np
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from strunc.digits import (get_magnitude, match_float_type, round_float,
+                           as_exact, is_finite, is_nan,
+                           get_exact_top_and_bottom_digit, mul_pow10,
+                           abs_exact, get_top_digit_array,
+                           is_shortest_repr_float)
+from strunc import pformat_float
+from strunc.sig_fig_rules import get_sig_fig_rule, round_float_array
 
 
 logger = logging.getLogger(__name__)
@@ -84,18 +97,18 @@ class FormatSpecData:
     format_type: FormatType = FormatType.DECIMAL
     short_form: bool = False
     display_mode: DisplayMode = DisplayMode.STANDARD
+    sig_fig_rule: str = 'pdg'
 
 
 def get_top_and_bottom_digit(num: float) -> tuple[int, int]:
-    if not np.isfinite(num):
+    if isinstance(num, Decimal) or is_shortest_repr_float(num):
+        return get_exact_top_and_bottom_digit(as_exact(num))
+    if not is_finite(num):
         return 0, 0
-    num = abs(num)
     max_digits = sys.float_info.dig
+    num = abs(float(num))
     int_part = int(num)
-    if int_part == 0:
-        magnitude = 1
-    else:
-        magnitude = int(log10(int_part)) + 1
+    magnitude = get_magnitude(num)
 
     if magnitude >= max_digits:
         return magnitude, 0
@@ -104,7 +117,7 @@ def get_top_and_bottom_digit(num: float) -> tuple[int, int]:
     multiplier = 10 ** (max_digits - magnitude)
     frac_digits = multiplier + int(multiplier * frac_part + 0.5)
     while frac_digits % 10 == 0:
-        frac_digits /= 10
+        frac_digits //= 10
     precision = int(log10(frac_digits))
 
     bottom_digit = -precision
@@ -184,15 +197,15 @@ class DriverType(Enum):
 
 def get_sig_fig_driver(val: float, unc: float,
                        unc_2: Optional[float] = None) -> DriverType:
-    if np.isfinite(unc) and unc != 0:
+    if is_finite(unc) and unc != 0:
         return DriverType.UNCERTAINTY
     elif unc_2 is not None:
-        if np.isfinite(unc_2) and unc_2 != 0:
+        if is_finite(unc_2) and unc_2 != 0:
             return DriverType.UNCERTAINTY_2
         else:
             logger.warning('Uncertainty must be finite and non-zero to set the '
                            'number of significant figures.')
-            if np.isfinite(val):
+            if is_finite(val):
                 logger.warning('Using value to set the number of significant '
                                'figures.')
                 return DriverType.VALUE
@@ -203,34 +216,22 @@ def get_sig_fig_driver(val: float, unc: float,
 
 
 def get_pdg_num_sig_figs_and_rounded_unc(unc: float) -> (int, float):
-    top_digit, _ = get_top_and_bottom_digit(unc)
-    unc_rounded_1 = round(unc, -top_digit + 2)
-    top_digit, _ = get_top_and_bottom_digit(unc_rounded_1)
-    top_three_dig = round(unc_rounded_1*10**(-top_digit + 2), 0)
-    if 100 <= top_three_dig <= 354:
-        num_sig_figs = 2
-        updated_unc = round(unc, -top_digit + 1)
-    elif 355 <= top_three_dig <= 949:
-        num_sig_figs = 1
-        updated_unc = round(unc, -top_digit)
-    elif 950 <= top_three_dig <= 999:
-        num_sig_figs = 2
-        updated_unc = 1000 * 10**(top_digit - 2)
-    else:
-        logger.debug(f'Top three digits calculated as {top_three_dig}')
-        raise ValueError(f'Unable to parse number of sig figs from {unc}.')
-
+    num_sig_figs, updated_unc, _ = get_sig_fig_rule('pdg').apply(unc)
     return num_sig_figs, updated_unc
 
 
 def round_val_unc_to_sig_figs(val: float, unc: float,
                               sig_fig_driver: DriverType,
-                              num_sig_figs: int) -> (float, float, int):
+                              num_sig_figs: int,
+                              sig_fig_rule: str = 'pdg'
+                              ) -> (float, float, int):
     logger.debug(f'{num_sig_figs=}')
     if sig_fig_driver == DriverType.UNCERTAINTY:
         if num_sig_figs == AUTO_SIG_FIGS:
-            num_sig_figs, unc = get_pdg_num_sig_figs_and_rounded_unc(unc)
-        top_digit, _ = get_top_and_bottom_digit(unc)
+            num_sig_figs, unc, top_digit = get_sig_fig_rule(
+                sig_fig_rule).apply(unc)
+        else:
+            top_digit, _ = get_top_and_bottom_digit(unc)
         bottom_digit = top_digit - num_sig_figs + 1
     elif sig_fig_driver == DriverType.VALUE:
         if num_sig_figs == AUTO_SIG_FIGS:
@@ -246,8 +247,8 @@ def round_val_unc_to_sig_figs(val: float, unc: float,
         bottom_digit = 0
 
     logger.debug(f'{bottom_digit=}')
-    val_rounded = round(val, -bottom_digit)
-    unc_rounded = round(unc, -bottom_digit)
+    val_rounded = round_float(val, -bottom_digit)
+    unc_rounded = round_float(unc, -bottom_digit)
 
     return val_rounded, unc_rounded, bottom_digit
 
@@ -255,16 +256,16 @@ def round_val_unc_to_sig_figs(val: float, unc: float,
 def get_exp_driver(val: float, unc: float,
                    short_form: bool,
                    unc_2: Optional[float] = None) -> DriverType:
-    if np.isfinite(val):
+    if is_finite(val):
         return DriverType.VALUE
     else:
         logger.warning('Value must be finite to set the exponent.')
         if not short_form:
-            if np.isfinite(unc):
+            if is_finite(unc):
                 logger.warning('Using uncertainty to set the exponent.')
                 return DriverType.UNCERTAINTY
             elif unc_2 is not None:
-                if np.isfinite(unc_2):
+                if is_finite(unc_2):
                     logger.warning('Using lower uncertainty to set the '
                                    'exponent.')
                     return DriverType.UNCERTAINTY_2
@@ -310,8 +311,13 @@ def float_mantissa_to_str(mantissa: float, exp: int,
     logger.debug(f'{mantissa=}')
     logger.debug(f'{top_digit_target=}')
     prec = max(-(bottom_digit - exp), 0)
-    format_str = f'{grouping_char}.{prec}f'
-    abs_mantissa_str = f'{abs(mantissa):{format_str}}'
+    if isinstance(mantissa, Decimal) and grouping_char == '_':
+        # Decimal only supports ',' grouping.
+        abs_mantissa_str = f'{abs_exact(mantissa):,.{prec}f}'.replace(',',
+                                                                      '_')
+    else:
+        format_str = f'{grouping_char}.{prec}f'
+        abs_mantissa_str = f'{abs_exact(mantissa):{format_str}}'
 
     top_digit, _ = get_top_and_bottom_digit(mantissa)
     top_digit = max(top_digit, 0)
@@ -391,7 +397,12 @@ def get_val_unc_exp_str(val_str: str, unc_str: str, exp: int,
 
 def format_val_unc(val: float, unc: float,
                    format_spec_data: FormatSpecData,
-                   unc_2: Optional = None) -> str:
+                   unc_2: Optional = None,
+                   exp: Optional[int] = None) -> str:
+    """
+    exp, if given, overrides the exponent chosen by the format type, e.g. to
+    share one exponent across several values.
+    """
     logger.debug(f'{val=}')
     logger.debug(f'{unc=}')
     logger.debug(f'{format_spec_data=}')
@@ -399,19 +410,25 @@ def format_val_unc(val: float, unc: float,
 
     asymmetric = unc_2 is not None
 
-    if np.isnan(val) or not np.isfinite(val) and format_spec_data.short_form:
+    val = as_exact(val)
+    unc = as_exact(unc)
+    if asymmetric:
+        unc_2 = as_exact(unc_2)
+
+    short_form = format_spec_data.short_form
+    if is_nan(val) or not is_finite(val) and short_form:
         logger.warning(f'short form not valid for nan of inf vals. Disabling '
                        f'short form.')
-        format_spec_data.short_form = False
+        short_form = False
 
     if unc < 0:
         logger.warning(f'Negative uncertainty {unc}, coercing to positive.')
-        unc = abs(unc)
+        unc = abs_exact(unc)
     if asymmetric:
         if unc_2 < 0:
             logger.warning(f'Negative lower uncertainty {unc}, coercing to '
                            f'positive.')
-            unc_2 = abs(unc_2)
+            unc_2 = abs_exact(unc_2)
 
     sig_fig_driver = get_sig_fig_driver(
         val, unc, unc_2)
@@ -420,7 +437,8 @@ def format_val_unc(val: float, unc: float,
     val_rounded_1, unc_rounded, bottom_digit_1 = round_val_unc_to_sig_figs(
         val, unc,
         sig_fig_driver=sig_fig_driver,
-        num_sig_figs=format_spec_data.num_sig_figs)
+        num_sig_figs=format_spec_data.num_sig_figs,
+        sig_fig_rule=format_spec_data.sig_fig_rule)
 
     val_rounded_2 = None
     unc_2_rounded = None
@@ -429,7 +447,8 @@ def format_val_unc(val: float, unc: float,
         val_rounded_2, unc_2_rounded, bottom_digit_2 = round_val_unc_to_sig_figs(
             val, unc_2,
             sig_fig_driver=sig_fig_driver,
-            num_sig_figs=format_spec_data.num_sig_figs)
+            num_sig_figs=format_spec_data.num_sig_figs,
+            sig_fig_rule=format_spec_data.sig_fig_rule)
     if asymmetric and sig_fig_driver is DriverType.UNCERTAINTY_2:
         val_rounded = val_rounded_2
         bottom_digit = bottom_digit_2
@@ -441,19 +460,38 @@ def format_val_unc(val: float, unc: float,
     logger.debug(f'{unc_2_rounded=}')
     logger.debug(f'{bottom_digit=}')
 
-    exp_driver = get_exp_driver(val, unc,
-                                format_spec_data.short_form,
-                                unc_2)
-    logger.debug(f'{exp_driver=}')
+    if exp is None:
+        exp_driver = get_exp_driver(val, unc,
+                                    short_form,
+                                    unc_2)
+        logger.debug(f'{exp_driver=}')
 
-    exp = get_exp(val_rounded, unc_rounded, exp_driver=exp_driver,
-                  format_type=format_spec_data.format_type)
+        exp = get_exp(val_rounded, unc_rounded, exp_driver=exp_driver,
+                      format_type=format_spec_data.format_type)
     logger.debug(f'{exp=}')
 
-    val_mantissa = val_rounded * 10**-exp
+    return format_rounded_val_unc(val, val_rounded, unc_rounded,
+                                  bottom_digit, exp, format_spec_data,
+                                  short_form, unc_2_rounded)
+
+
+def format_rounded_val_unc(val: float, val_rounded: float,
+                           unc_rounded: float, bottom_digit: int, exp: int,
+                           format_spec_data: FormatSpecData,
+                           short_form: bool,
+                           unc_2_rounded: Optional[float] = None) -> str:
+    """
+    Build the output string from the rounding and exponent analysis of
+    format_val_unc(). val is the unrounded value, used to show nan and inf.
+    """
+    asymmetric = unc_2_rounded is not None
+
+    val_mantissa = match_float_type(mul_pow10(val_rounded, -exp),
+                                      val_rounded)
     logger.debug(f'{val_mantissa=}')
 
-    unc_mantissa = unc_rounded * 10**-exp
+    unc_mantissa = match_float_type(mul_pow10(unc_rounded, -exp),
+                                      unc_rounded)
     logger.debug(f'{unc_mantissa=}')
 
     val_top_digit, _ = get_top_and_bottom_digit(val_mantissa)
@@ -463,16 +501,17 @@ def format_val_unc(val: float, unc: float,
 
     unc_2_mantissa = None
     if asymmetric:
-        unc_2_mantissa = unc_2_rounded * 10**-exp
+        unc_2_mantissa = match_float_type(mul_pow10(unc_2_rounded, -exp),
+                                          unc_2_rounded)
         unc_2_top_digit, _ = get_top_and_bottom_digit(unc_2_mantissa)
         top_digit_target = max(top_digit_target, unc_2_top_digit)
     logger.debug(f'{unc_2_mantissa=}')
 
-    if np.isnan(val):
+    if is_nan(val):
         val_mantissa_str = 'nan'
-    elif val == np.inf:
+    elif val == inf:
         val_mantissa_str = 'inf'
-    elif val == -np.inf:
+    elif val == -inf:
         val_mantissa_str = '-inf'
     else:
         val_mantissa_str = float_mantissa_to_str(
@@ -481,9 +520,9 @@ def format_val_unc(val: float, unc: float,
             format_spec_data.sign_symbol_rule, format_spec_data.grouping_char)
     logger.debug(f'{val_mantissa_str=}')
 
-    if np.isnan(unc_mantissa):
+    if is_nan(unc_mantissa):
         unc_mantissa_str = 'nan'
-    elif unc_mantissa == np.inf:
+    elif unc_mantissa == inf:
         unc_mantissa_str = 'inf'
     else:
         unc_mantissa_str = float_mantissa_to_str(
@@ -495,9 +534,9 @@ def format_val_unc(val: float, unc: float,
 
     unc_2_mantissa_str = None
     if asymmetric:
-        if np.isnan(unc_2_mantissa):
+        if is_nan(unc_2_mantissa):
             unc_2_mantissa_str = 'nan'
-        elif unc_2_mantissa == np.inf:
+        elif unc_2_mantissa == inf:
             unc_2_mantissa_str = 'inf'
         else:
             unc_2_mantissa_str = float_mantissa_to_str(
@@ -510,7 +549,7 @@ def format_val_unc(val: float, unc: float,
     val_unc_exp_str = get_val_unc_exp_str(val_mantissa_str,
                                           unc_mantissa_str,
                                           exp,
-                                          format_spec_data.short_form,
+                                          short_form,
                                           format_spec_data.format_type,
                                           format_spec_data.display_mode,
                                           unc_2_mantissa_str)
@@ -518,6 +557,126 @@ def format_val_unc(val: float, unc: float,
     return val_unc_exp_str
 
 
+def round_unc_array(uncs, num_sig_figs: int, sig_fig_rule: str):
+    """
+    Vectorized round_val_unc_to_sig_figs() of positive finite uncs driving
+    the significant figures. Returns (rounded uncs, bottom digits).
+    """
+    if num_sig_figs == AUTO_SIG_FIGS:
+        num_sig_figs, uncs, top_digit = get_sig_fig_rule(
+            sig_fig_rule).apply(uncs)
+    else:
+        top_digit = get_top_digit_array(uncs)
+    bottom_digit = top_digit - num_sig_figs + 1
+    return round_float_array(uncs, -bottom_digit), bottom_digit
+
+
+def get_exp_from_top_digit_array(top_digit, format_type: FormatType):
+    if format_type is FormatType.ENGINEERING:
+        return (top_digit // 3) * 3
+    elif format_type is FormatType.ENGINEERING_UPPER:
+        return ((top_digit + 1) // 3) * 3
+    return top_digit
+
+
+segment_format_types = {
+    FormatType.SCIENTIFIC: pformat_float.FormatType.SCIENTIFIC,
+    FormatType.ENGINEERING: pformat_float.FormatType.ENGINEERING,
+    FormatType.ENGINEERING_UPPER:
+        pformat_float.FormatType.ENGINEERING_SHIFTED,
+}
+
+
+def get_exp_array(vals_rounded, format_type: FormatType):
+    """
+    Vectorized get_exp() driven by the finite vals_rounded. Sorted 1-d
+    input, e.g. a sweep, takes its exponents from the exponent segments of
+    pformat_float rather than a logarithm per element. They are checked
+    against the top digit wherever the exponent or the sign changes, and
+    at the ends, as the top digit steps differently from 1e14 upwards.
+    """
+    if format_type is FormatType.DECIMAL:
+        return np.zeros(np.shape(vals_rounded), dtype=np.int64)
+    if (np.ndim(vals_rounded) == 1 and np.size(vals_rounded) > 0
+            and pformat_float.is_monotonic(vals_rounded)):
+        exps = pformat_float.get_exp_array_monotonic(
+            vals_rounded, segment_format_types[format_type])
+        if exps is not None:
+            steps = np.flatnonzero((np.diff(exps) != 0)
+                                   | (np.diff(np.sign(vals_rounded)) != 0))
+            check_idx = np.unique(np.concatenate(
+                [[0, len(exps) - 1], steps, steps + 1]))
+            check_exps = get_exp_from_top_digit_array(
+                get_top_digit_array(vals_rounded[check_idx]), format_type)
+            if np.array_equal(exps[check_idx], check_exps):
+                return exps
+    return get_exp_from_top_digit_array(get_top_digit_array(vals_rounded),
+                                        format_type)
+
+
+def round_val_unc_array(vals, unc_columns, format_spec_data: FormatSpecData):
+    """
+    Rounding and exponent analysis of format_val_unc_array() for float64
+    vals and one or two uncertainty columns. Returns (vectorized,
+    vals_rounded, rounded unc columns, bottom digits, exponents) where
+    vectorized marks the rows with a finite value and finite positive
+    uncertainties. The other rows hold placeholder results.
+    """
+    vectorized = np.isfinite(vals)
+    for column in unc_columns:
+        vectorized &= np.isfinite(column) & (column > 0)
+
+    rounded_columns = []
+    bottom_digit = None
+    for column in unc_columns:
+        rounded_column, column_bottom_digit = round_unc_array(
+            np.where(vectorized, column, 1.0), format_spec_data.num_sig_figs,
+            format_spec_data.sig_fig_rule)
+        rounded_columns.append(rounded_column)
+        if bottom_digit is None:
+            bottom_digit = column_bottom_digit
+    vals_rounded = round_float_array(np.where(vectorized, vals, 0),
+                                     -bottom_digit)
+    exps = get_exp_array(vals_rounded, format_spec_data.format_type)
+    return vectorized, vals_rounded, rounded_columns, bottom_digit, exps
+
+
+def format_val_unc_array(vals, uncs, format_spec_data: FormatSpecData,
+                         uncs_2=None) -> list[str]:
+    """
+    Vectorized format_val_unc() for float64 numpy arrays. The significant
+    figure rule, the rounding and the exponent are worked out for whole
+    arrays and only the output strings are built row by row. Rows with a
+    non-finite value or a non-finite or non-positive uncertainty are
+    formatted with format_val_unc().
+    """
+    vals = np.ravel(np.asarray(vals, dtype=float))
+    unc_columns = [uncs] if uncs_2 is None else [uncs, uncs_2]
+    unc_columns = [np.ravel(np.asarray(column, dtype=float))
+                   for column in unc_columns]
+
+    vectorized, vals_rounded, rounded_columns, bottom_digit, exps = (
+        round_val_unc_array(vals, unc_columns, format_spec_data))
+    rounded_columns = [column.tolist() for column in rounded_columns]
+
+    short_form = format_spec_data.short_form
+    val_unc_strs = []
+    for i, (val, val_rounded, row_bottom_digit, exp, row_vectorized) in (
+            enumerate(zip(vals.tolist(), vals_rounded.tolist(),
+                          bottom_digit.tolist(), exps.tolist(),
+                          vectorized.tolist()))):
+        if not row_vectorized:
+            val_unc_strs.append(format_val_unc(
+                val, unc_columns[0][i].item(), format_spec_data,
+                None if uncs_2 is None else unc_columns[1][i].item()))
+            continue
+        val_unc_strs.append(format_rounded_val_unc(
+            val, val_rounded, rounded_columns[0][i], row_bottom_digit, exp,
+            format_spec_data, short_form,
+            None if uncs_2 is None else rounded_columns[1][i]))
+    return val_unc_strs
+
+
 def format_val_unc_from_str(val: float, unc: float, format_spec: str = '',
                             unc_2: Optional[float] = None):
     format_spec_data = parse_format_spec(format_spec)
@@ -525,6 +684,21 @@ def format_val_unc_from_str(val: float, unc: float, format_spec: str = '',
     return val_unc_exp_str
 
 
+@lru_cache(maxsize=256)
+def compile_format_spec(format_spec: str) -> Callable[..., str]:
+    """
+    Parse format_spec once and return a function formatting
+    (val, unc, unc_2=None, exp=None) with it.
+    """
+    format_spec_data = parse_format_spec(format_spec)
+
+    def formatter(val: float, unc: float,
+                  unc_2: Optional[float] = None,
+                  exp: Optional[int] = None) -> str:
+        return format_val_unc(val, unc, format_spec_data, unc_2, exp)
+    return formatter
+
+
 def main():
     val = 123.456
     unc = 0.7
@@ -0,0 +1,92 @@
+from string import Formatter
+from typing import Callable, Iterable, Iterator, Union
+
+from strunc.prefix_float import compile_format_spec
+
+
+conversion_funcs = {'s': str,
+                    'r': repr,
+                    'a': ascii}
+
+
+def get_field_key(field_name: str, auto_idx: int) -> Union[int, str]:
+    if field_name == '':
+        return auto_idx
+    if field_name.isdigit():
+        return int(field_name)
+    if not field_name.isidentifier():
+        raise ValueError(f'Unsupported field name {field_name!r}. Only '
+                         f'positional indices and names are supported.')
+    return field_name
+
+
+def compile_field(format_spec: str,
+                  conversion: str) -> Callable[[object], str]:
+    if '{' in format_spec:
+        raise ValueError(f'Nested replacement fields are not supported in '
+                         f'format spec {format_spec!r}.')
+    if conversion is None:
+        return compile_format_spec(format_spec)
+
+    conversion_func = conversion_funcs[conversion]
+
+    def formatter(value) -> str:
+        return format(conversion_func(value), format_spec)
+    return formatter
+
+
+class FormatTemplate:
+    """
+    str.format style template whose fields use pfloat or prefix_float format
+    specs, e.g. '{v:_3e} {i:.2r} {p:_2Rp}'. The template and every format
+    spec are parsed once on construction. Fields are looked up by position
+    or name so rows may be tuples, dicts or numpy records. Fields with a
+    conversion, e.g. '{name!s}', are formatted with the built-in format().
+    """
+    def __init__(self, template: str):
+        self.template = template
+        self.fields: list[tuple[str, Union[int, str],
+                                Callable[[object], str]]] = []
+        self.tail = ''
+
+        auto_idx = 0
+        manual_numbering = False
+        # Escaped braces split the literal text into several field-less
+        # chunks, which are joined up to the next field.
+        pending = ''
+        for literal, field_name, format_spec, conversion in Formatter().parse(
+                template):
+            pending += literal
+            if field_name is None:
+                continue
+            if field_name == '':
+                if manual_numbering:
+                    raise ValueError('Cannot switch from manual field '
+                                     'numbering to automatic numbering.')
+                key = get_field_key(field_name, auto_idx)
+                auto_idx += 1
+            else:
+                if auto_idx > 0 and field_name.isdigit():
+                    raise ValueError('Cannot switch from automatic field '
+                                     'numbering to manual numbering.')
+                manual_numbering = manual_numbering or field_name.isdigit()
+                key = get_field_key(field_name, auto_idx)
+            formatter = compile_field(format_spec, conversion)
+            self.fields.append((pending, key, formatter))
+            pending = ''
+        self.tail = pending
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.template!r})'
+
+    def format(self, row) -> str:
+        parts = []
+        for literal, key, formatter in self.fields:
+            parts.append(literal)
+            parts.append(formatter(row[key]))
+        parts.append(self.tail)
+        return ''.join(parts)
+
+    def format_rows(self, rows: Iterable) -> Iterator[str]:
+        for row in rows:
+            yield self.format(row)
@@ -0,0 +1,92 @@
+from math import isfinite
+from typing import Iterable
+
+from strunc.pformat_float import (FormatType, PrecType,
+                                  format_float_by_top_bottom_dig,
+                                  get_bottom_digit, get_exp_str,
+                                  get_mantissa_exp, get_top_digit,
+                                  parse_format_spec)
+from strunc.prefix_float import replace_prefix
+from strunc.sig_fig_rules import scale_pow10
+
+
+def get_shared_exp(ticks: list[float], format_type: FormatType) -> int:
+    """
+    Exponent of the largest finite tick, which all ticks share so that the
+    labels of an axis differ only in their mantissas.
+    """
+    finite_ticks = [abs(tick) for tick in ticks if isfinite(tick)]
+    if not finite_ticks:
+        return 0
+    _, exp = get_mantissa_exp(max(finite_ticks), format_type)
+    return exp
+
+
+def get_tick_precision(mantissas: list[float]) -> int:
+    """
+    Smallest number of decimal places at which the finite mantissas, as far
+    as they differ, still give distinct labels. The starting guess is the
+    bottom digit of the smallest gap between neighbouring ticks, e.g. 2 for
+    ticks spaced by 0.25, which is then only increased, at most to the
+    bottom digit of the ticks themselves, if rounding still merges labels.
+    """
+    finite = sorted({mantissa for mantissa in mantissas if isfinite(mantissa)})
+    if not finite:
+        return 0
+    max_places = max(-get_bottom_digit(mantissa) for mantissa in finite)
+    if len(finite) == 1:
+        return max_places
+
+    min_gap = min(high - low for low, high in zip(finite, finite[1:]))
+    places = min(-get_bottom_digit(min_gap), max_places)
+    while (places < max_places
+           and len({round(mantissa, places) for mantissa in finite})
+           < len(finite)):
+        places += 1
+    return places
+
+
+def format_ticks(ticks: Iterable[float], format_spec: str = '') -> list[str]:
+    """
+    Format axis tick labels with one pfloat or prefix_float format spec,
+    e.g. 'r', 'Rp' or 'Bp'. All labels share the exponent (or SI/IEC
+    prefix) of the largest tick and, unless format_spec gives a precision,
+    use the smallest number of decimal places that keeps them distinct.
+    A sig fig precision counts from the top digit of the largest tick.
+    """
+    prefix = format_spec.endswith('p')
+    if prefix:
+        format_spec = format_spec[:-1]
+    format_spec_data = parse_format_spec(format_spec)
+    format_type = format_spec_data.format_type
+
+    ticks = [float(tick) for tick in ticks]
+    exp = get_shared_exp(ticks, format_type)
+    if (format_type is FormatType.BINARY
+            or format_type is FormatType.BINARY_IEC):
+        mantissas = [tick * 2.0**-exp for tick in ticks]
+    else:
+        mantissas = [scale_pow10(tick, -exp) for tick in ticks]
+
+    prec = format_spec_data.precision
+    if prec is None:
+        round_digit = -get_tick_precision(mantissas)
+    elif format_spec_data.prec_type is PrecType.SIG_FIG:
+        max_mantissa = max((abs(mantissa) for mantissa in mantissas
+                            if isfinite(mantissa)), default=0)
+        round_digit = get_top_digit(max_mantissa) - (prec - 1)
+    else:
+        round_digit = -prec
+
+    exp_str = get_exp_str(exp, format_type)
+    labels = []
+    for tick, mantissa in zip(ticks, mantissas):
+        if not isfinite(tick):
+            labels.append(str(tick))
+            continue
+        mantissa_str = format_float_by_top_bottom_dig(
+            mantissa, format_spec_data.top_padded_digit, round_digit,
+            format_spec_data.sign_mode)
+        label = f'{mantissa_str}{exp_str}'
+        labels.append(replace_prefix(label) if prefix else label)
+    return labels
@@ -0,0 +1,77 @@
+import asyncio
+import unittest
+
+from strunc.pformat_float import pfloat
+from strunc.async_stream import (aformat_stream, aformat_val_unc_stream,
+                                 as_float_array, iter_batches)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+async def agen(items, delay=0.0):
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        yield item
+
+
+class TestAsyncStream(unittest.IsolatedAsyncioTestCase):
+    async def test_order(self):
+        nums = [i * 1.5 + 0.25 for i in range(1000)]
+        expected = [f'{pfloat(num):_3e}' for num in nums]
+        actual = [num_str async for num_str in
+                  aformat_stream(agen(nums), '_3e', max_batch_size=64,
+                                 max_pending_batches=2)]
+        assert actual == expected
+
+    async def test_val_unc(self):
+        items = [(123.456, 0.789), (1.0, 0.25)]
+        actual = [val_unc_str async for val_unc_str in
+                  aformat_val_unc_stream(agen(items), 'S')]
+        assert actual == ['123.5(8)', '1.00(25)']
+        items = [(1.0, 0.2, 0.3)]
+        actual = [val_unc_str async for val_unc_str in
+                  aformat_val_unc_stream(agen(items))]
+        assert actual == ['1.00 (+0.20, -0.30)']
+
+    async def test_mixed_val_unc(self):
+        items = [(1.0, 0.1, 0.5), (2.0, 0.2), (3.0, 0.3, 0.1), (4.0, 0.4)]
+        actual = [val_unc_str async for val_unc_str in
+                  aformat_val_unc_stream(agen(items))]
+        assert actual == ['1.00 (+0.10, -0.50)', '2.00+/-0.20',
+                          '3.00 (+0.30, -0.10)', '4.0+/-0.4']
+        with self.assertRaises(ValueError):
+            async for _ in aformat_val_unc_stream(agen([(1.0, 0.1), (1.0,)])):
+                pass
+
+    async def test_latency_flush(self):
+        batch_sizes = [len(batch) async for batch in
+                       iter_batches(agen(range(5), delay=0.02), 100, 0.001)]
+        assert batch_sizes == [1, 1, 1, 1, 1]
+        batch_sizes = [len(batch) async for batch in
+                       iter_batches(agen(range(5)), 2, 10)]
+        assert batch_sizes == [2, 2, 1]
+
+    async def test_exact_items(self):
+        nums = [10**20 + 1, 0.5]
+        actual = [num_str async for num_str in aformat_stream(agen(nums))]
+        assert actual == ['100000000000000000001', '0.5']
+
+    @unittest.skipIf(np is None, 'numpy not installed')
+    def test_float_array(self):
+        nums = as_float_array([1.5, 0.25])
+        assert isinstance(nums, np.ndarray) and nums.dtype == float
+        assert as_float_array([1.5, 2]) == [1.5, 2]
+
+    async def test_error(self):
+        with self.assertRaises(TypeError):
+            async for _ in aformat_stream(agen([1.0, 'x'])):
+                pass
+
+
+if __name__ == '__main__':
+
+    unittest.main()
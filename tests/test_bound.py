@@ -0,0 +1,56 @@
+import pickle
+import unittest
+
+from strunc.bound import BoundFloat, bind_format_spec
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class TestBoundFloat(unittest.TestCase):
+    def setUp(self):
+        self.kilo = bind_format_spec('_3rp')
+
+    def test_format(self):
+        num = self.kilo(15300.0)
+        assert str(num) == '15.3 k'
+        assert f'{num}' == '15.3 k'
+        assert f'{num:_2e}' == '1.5e+04'
+        assert str(BoundFloat(0.5)) == '0.5'
+        assert repr(num) == "BoundFloat['_3rp'](15300.0)"
+        assert bind_format_spec('_3rp') is self.kilo
+
+    def test_arithmetic(self):
+        num = self.kilo(15300.0)
+        for result in [num + 1, 1 + num, num * 2, 2 * num, num / 2, -num,
+                       abs(num), num ** 2, 2 ** self.kilo(3.0),
+                       round(num, -3)]:
+            assert type(result) is self.kilo
+        assert str(num * 2) == '30.6 k'
+        assert type(round(num)) is int
+        assert num == 15300.0
+
+    @unittest.skipIf(np is None, 'numpy not installed')
+    def test_numpy(self):
+        num = self.kilo(15300.0)
+        for result in [num * np.float64(2), np.float64(2) * num,
+                       np.float32(2) * num, np.int64(2) * num, np.sqrt(num)]:
+            assert type(result) is self.kilo
+        assert str(np.float64(2) * num) == '30.6 k'
+        product = np.array([1.0, 2.0]) * num
+        assert type(product) is np.ndarray
+        assert product.tolist() == [15300.0, 30600.0]
+
+    def test_slots_and_pickle(self):
+        num = self.kilo(15300.0)
+        with self.assertRaises(AttributeError):
+            num.unit = 'Hz'
+        unpickled = pickle.loads(pickle.dumps(num))
+        assert type(unpickled) is self.kilo
+        assert str(unpickled) == '15.3 k'
+        kHz = bind_format_spec('_3rp', 'kHz')
+        assert type(pickle.loads(pickle.dumps(kHz(1500.0)))) is kHz
+        assert type(pickle.loads(pickle.dumps(BoundFloat(1.5)))) is BoundFloat
+        assert bind_format_spec('_3rp', None) is bind_format_spec('_3rp')
@@ -0,0 +1,79 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from strunc.cli import main, format_chunk
+from strunc.strunc2 import format_val_unc_from_str
+
+
+class TestCli(unittest.TestCase):
+    def run_cli(self, text, format_spec, *options):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'input.txt')
+            with open(path, 'w') as file:
+                file.write(text)
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                return_code = main(['format', *options, format_spec, path])
+        return return_code, out.getvalue()
+
+    def test_format_chunk(self):
+        assert format_chunk(['123.456', '', '15300 0.001'], '_3e') == (
+            '1.23e+02\n\n1.53e+04 1.00e-03\n')
+        assert format_chunk(['15300'], '_2Rp') == '15 k\n'
+        assert format_chunk(['123.456 0.789'], 'S', val_unc=True) == (
+            '123.5(8)\n')
+        assert format_chunk(['1,0.2,0.3'], '', val_unc=True,
+                            delimiter=',') == '1.00 (+0.20, -0.30)\n'
+        assert format_chunk(['123456789012345678901'], 'r',
+                            decimal=True) == '123.456789012345678901e+18\n'
+
+    def test_val_unc_chunk(self):
+        lines = ['123.456 0.789', '', '1 0.2 0.3', '-0.0123 0.00045',
+                 'nan 0.1']
+        expected = ''
+        for line in lines:
+            if line:
+                val, unc, *unc_2 = map(float, line.split())
+                expected += format_val_unc_from_str(val, unc, 'S', *unc_2)
+            expected += '\n'
+        assert format_chunk(lines, 'S', val_unc=True) == expected
+        assert format_chunk(['1.00 0.25', '2 0.5'], '', val_unc=True,
+                            decimal=True) == '1.00+/-0.25\n2.0+/-0.5\n'
+
+    def test_main(self):
+        text = ''.join(f'{i}.5\n' for i in range(50))
+        expected = ''.join(f'{i}.5\n' for i in range(50))
+        assert self.run_cli(text, '.1') == (0, expected)
+        assert self.run_cli(text, '.1', '-j', '2',
+                                 '--chunk-size', '7') == (
+            0, expected)
+
+    def test_bad_input(self):
+        with contextlib.redirect_stderr(io.StringIO()) as err:
+            assert self.run_cli('1 2 3 4\n', '', '-u')[0] == 1
+        assert 'Expected 2 or 3 columns' in err.getvalue()
+
+    def test_empty_field(self):
+        with contextlib.redirect_stderr(io.StringIO()) as err:
+            assert self.run_cli('1,,0.2\n', '', '-u', '-d', ',')[0] == 1
+        assert 'Empty field' in err.getvalue()
+
+    def test_bad_decimal(self):
+        with contextlib.redirect_stderr(io.StringIO()) as err:
+            assert self.run_cli('1 abc\n', '', '--decimal')[0] == 1
+        assert 'Invalid number' in err.getvalue()
+
+    def test_broken_pipe(self):
+        proc = subprocess.Popen(
+            [sys.executable, '-m', 'strunc', 'format', '_3'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE)
+        proc.stdout.close()
+        _, err = proc.communicate(
+            ''.join(f'{i}\n' for i in range(100000)).encode())
+        assert b'Traceback' not in err
@@ -0,0 +1,116 @@
+import unittest
+
+from strunc import strunc2
+from strunc.digits import get_bottom_digit_array
+from strunc.pformat_float import (get_bottom_digit, get_top_and_bottom_digit,
+                                  pformat_float, pformat_float_array,
+                                  parse_format_spec)
+from strunc.strunc2 import format_val_unc_from_str
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+float32_cases: dict[float, dict[str, str]] = {
+    0.1: {'': '0.1',
+          'e': '1e-01',
+          'r': '100e-03',
+          '_3': '0.100'},
+    3.14159e-4: {'': '0.000314159',
+                 'e': '3.14159e-04',
+                 '_3': '0.000314'},
+    123456.7: {'': '123456.7',
+               'e': '1.234567e+05',
+               '_3': '123000'},
+    -2.5: {'': '-2.5',
+           '+r': '-2.5e+00'},
+    1234.567: {'': '1234.567'},
+    1e12: {'_3': '1000000000000'},
+    123456789: {'': '123456790'},
+    3.4e38: {'': '34' + '0' * 37,
+             'e': '3.4e+38'},
+    1e-20: {'e': '1e-20',
+            '_2r': '10e-21'},
+}
+
+
+@unittest.skipIf(np is None, 'numpy not installed')
+class TestFloat32(unittest.TestCase):
+    def test_scalar(self):
+        for num, fmt_dict in float32_cases.items():
+            for format_spec, expected_num_str in fmt_dict.items():
+                num_str = pformat_float(np.float32(num),
+                                        parse_format_spec(format_spec))
+                with self.subTest(num=num, format_spec=format_spec,
+                                  expected_num_str=expected_num_str,
+                                  actual_num_str=num_str):
+                    assert num_str == expected_num_str
+
+    def test_array(self):
+        nums = np.array(list(float32_cases), dtype=np.float32)
+        for format_spec in ('', 'e', 'r', '_3', '.2B'):
+            format_spec_data = parse_format_spec(format_spec)
+            expected = [pformat_float(num, format_spec_data) for num in nums]
+            actual = pformat_float_array(nums, format_spec_data)
+            with self.subTest(format_spec=format_spec):
+                assert actual == expected
+
+    def test_float64_array(self):
+        nums = np.array([123.456, -0.031415, 0, np.nan, -np.inf, 1e16])
+        for format_spec in ('', 'e', 'r', 'R', '_3', '.3b', '4'):
+            format_spec_data = parse_format_spec(format_spec)
+            expected = [pformat_float(float(num), format_spec_data)
+                        for num in nums]
+            actual = pformat_float_array(nums, format_spec_data)
+            with self.subTest(format_spec=format_spec):
+                assert actual == expected
+
+    def test_float64_array_powers_of_ten(self):
+        # Powers of ten and decimal ties, e.g. 4.425e+05, whose mantissas
+        # are only exact if the array path scales like pformat_float().
+        nums = np.array([float(f'{lead}e{exp}')
+                         for lead in (1, 5, 125, 4425, 9995, 1005)
+                         for exp in range(-300, 300, 7)])
+        nums = np.concatenate([nums, -nums])
+        for format_spec in ('', 'e', '_2e', '+5_3e', '_1r', '_4R', '.2e',
+                            '_3b'):
+            format_spec_data = parse_format_spec(format_spec)
+            expected = [pformat_float(float(num), format_spec_data)
+                        for num in nums]
+            for monotonic in (False, None):
+                actual = pformat_float_array(nums, format_spec_data,
+                                             monotonic)
+                with self.subTest(format_spec=format_spec,
+                                  monotonic=monotonic):
+                    assert actual == expected
+            actual = pformat_float_array(np.sort(nums), format_spec_data)
+            with self.subTest(format_spec=format_spec, sorted=True):
+                assert actual == [pformat_float(float(num), format_spec_data)
+                                  for num in np.sort(nums)]
+
+    def test_digits(self):
+        # Narrow floats take their digits from their shortest repr.
+        nums = np.array([1234.567, 123456.7, 0.1, 1e12, np.inf],
+                        dtype=np.float32)
+        expected_bottom_digits = [-3, -1, -1, 0, 0]
+        assert [get_bottom_digit(num)
+                for num in nums] == expected_bottom_digits
+        assert get_bottom_digit_array(nums).tolist() == expected_bottom_digits
+        assert get_top_and_bottom_digit(np.float32(1e12)) == (12, 0)
+        assert strunc2.get_top_and_bottom_digit(
+            np.float32(123456.7)) == (5, -1)
+
+    def test_val_unc(self):
+        val_unc_str = format_val_unc_from_str(np.float32(0.1),
+                                              np.float32(0.02), '.3')
+        assert val_unc_str == '0.1000+/-0.0200'
+        val_unc_str = format_val_unc_from_str(np.float16(12.5),
+                                              np.float16(0.3), '.3e')
+        assert val_unc_str == '(1.2500+/-0.0300)e+01'
+
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from decimal import Decimal
+
+from strunc.pformat_float import pdecimal, pformat_float, parse_format_spec
+from strunc.strunc2 import format_val_unc_from_str
+
+
+cases: dict[object, dict[str, str]] = {
+    Decimal('0.1'): {'': '0.1',
+                     'e': '1e-01',
+                     'r': '100e-03',
+                     '_3': '0.100'},
+    Decimal('1.50'): {'': '1.50',
+                      'e': '1.50e+00',
+                      '_2': '1.5'},
+    Decimal('-0.031415'): {'': '-0.031415',
+                           'r': '-31.415e-03',
+                           '.3': '-0.031',
+                           '_3e': '-3.14e-02'},
+    Decimal('123456789012345678901234567890.123'): {
+        '': '123456789012345678901234567890.123',
+        'e': '1.23456789012345678901234567890123e+29',
+        '_3r': '123e+27'},
+    2**60 + 1: {'': '1152921504606846977',
+                'e': '1.152921504606846977e+18',
+                '_4': '1153000000000000000'},
+    2**70: {'b': '1b+70',
+            '_3B': '1.00b+70'},
+    Decimal('NaN'): {'': 'nan'},
+    Decimal('-Infinity'): {'': '-inf'},
+}
+
+
+val_unc_cases: dict[tuple[object, object], dict[str, str]] = {
+    (Decimal('123.456'), Decimal('0.789')): {'': '123.5+/-0.8',
+                                             'e': '(1.235+/-0.008)e+02',
+                                             'S': '123.5(8)'},
+    (10**25 + 7, 3): {'': '10000000000000000000000007.0+/-3.0'},
+    (Decimal('1.000'), Decimal('0.0096')): {'': '1.000+/-0.010'},
+    (Decimal('1234567.891'), Decimal('0.012')): {'_': '1_234_567.891+/-0.012',
+                                                 ',': '1,234,567.891+/-0.012'},
+}
+
+
+class TestExact(unittest.TestCase):
+    def test_pformat(self):
+        for num, fmt_dict in cases.items():
+            for format_spec, expected_num_str in fmt_dict.items():
+                num_str = pformat_float(num, parse_format_spec(format_spec))
+                with self.subTest(num=num, format_spec=format_spec,
+                                  expected_num_str=expected_num_str,
+                                  actual_num_str=num_str):
+                    assert num_str == expected_num_str
+
+    def test_pdecimal(self):
+        assert f'{pdecimal("3.14159"):_3e}' == '3.14e+00'
+
+    def test_val_unc(self):
+        for (val, unc), fmt_dict in val_unc_cases.items():
+            for format_spec, expected_str in fmt_dict.items():
+                val_unc_str = format_val_unc_from_str(val, unc, format_spec)
+                with self.subTest(val=val, unc=unc, format_spec=format_spec,
+                                  expected_str=expected_str,
+                                  actual_str=val_unc_str):
+                    assert val_unc_str == expected_str
+
+
+if __name__ == '__main__':
+
+    unittest.main()
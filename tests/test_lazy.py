@@ -0,0 +1,113 @@
+import logging
+import unittest
+
+from strunc.batch import format_batch, format_val_unc_batch
+from strunc.lazy import FormattedColumn, LazyFloat, LazyValUnc
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class TestLazy(unittest.TestCase):
+    def test_float(self):
+        num = LazyFloat(123.456, '_3e')
+        assert str(num) == '1.23e+02'
+        assert f'{num}' == '1.23e+02'
+        assert f'{num:.1r}' == '123.5e+00'
+        assert f'{LazyFloat(15300.0, "_2Rp")}' == '15 k'
+
+    def test_val_unc(self):
+        val_unc = LazyValUnc(123.456, 0.789, 'S')
+        assert str(val_unc) == '123.5(8)'
+        assert f'{val_unc:e}' == '(1.235+/-0.008)e+02'
+        assert str(LazyValUnc(1, 0.2, '', unc_2=0.3)) == '1.00 (+0.20, -0.30)'
+
+    def test_memoized(self):
+        val_unc = LazyValUnc(123.456, 0.789)
+        assert val_unc._cache is None
+        str(val_unc)
+        val_unc.val = 0
+        assert str(val_unc) == '123.5+/-0.8'
+
+    def test_filtered_logging(self):
+        logger = logging.getLogger('strunc.test_lazy')
+        logger.setLevel(logging.WARNING)
+        num = LazyFloat(123.456, '_3e')
+        val_unc = LazyValUnc(123.456, 0.789)
+        logger.debug('%s %s', num, val_unc)
+        assert num._cache is None
+        assert val_unc._cache is None
+
+
+@unittest.skipIf(np is None, 'numpy not installed')
+class TestFormattedColumn(unittest.TestCase):
+    nums = [0.0, -1.5, 999.96, 15300.0, 2.5e-7, float('nan'), -float('inf'),
+            1e21, 123.456]
+
+    def test_getitem(self):
+        nums = np.array(self.nums * 10)
+        column = FormattedColumn(nums, '_3rp', window_size=8, max_windows=2)
+        expected = format_batch(nums, '_3rp')
+        assert len(column) == len(nums)
+        assert column[3] == '15.3 k'
+        assert column[-1] == expected[-1]
+        assert column[5:20:3] == expected[5:20:3]
+        assert len(column._windows) == 2
+        assert list(column) == expected
+
+    def test_widths(self):
+        nums = np.array(self.nums)
+        for format_spec in ['', '.2', '_3e', '+_2r', '_3Rp', '08.1', '_3Bp',
+                            'b']:
+            with self.subTest(format_spec=format_spec):
+                column = FormattedColumn(nums, format_spec)
+                num_strs = format_batch(nums, format_spec)
+                assert column.get_widths().tolist() == [
+                    len(num_str) for num_str in num_strs]
+                assert column.max_width() == max(map(len, num_strs))
+                assert column._windows == {}
+
+    def test_shared_exp(self):
+        column = FormattedColumn(np.array([1.5, -2.5e4, float('inf')]), 'r')
+        assert column.shared_exp() == 3
+        assert FormattedColumn(np.array([1, 2]), 'e').shared_exp() == 0
+
+    def test_val_unc(self):
+        vals = np.array([123.456, -0.0123, 999.96, 1.5e7, float('nan'), 2.0,
+                         1e22] * 3)
+        uncs = np.array([0.789, 0.00045, 0.04, 2.5e5, 0.1, 0.0, 5e21] * 3)
+        uncs_2 = uncs * 1.5 + 1e-3
+        for format_spec in ['', 'e', 'r', 'S', 'eS', '+_', ' >3.3', 'eP',
+                            'rL', '0>2_eS']:
+            for column_uncs_2 in [None, uncs_2]:
+                with self.subTest(format_spec=format_spec,
+                                  asymmetric=column_uncs_2 is not None):
+                    column = FormattedColumn(vals, format_spec, window_size=4,
+                                             uncs=uncs, uncs_2=column_uncs_2)
+                    expected = format_val_unc_batch(vals, uncs, format_spec,
+                                                    column_uncs_2)
+                    widths = column.get_widths().tolist()
+                    assert len(column._windows) == 0
+                    assert list(column) == expected
+                    assert widths == [len(val_unc_str)
+                                      for val_unc_str in expected]
+        column = FormattedColumn(vals, 'e', uncs=uncs)
+        assert column[0] == '(1.235+/-0.008)e+02'
+        column = FormattedColumn(np.array([1.5e7, -2.5e8, np.nan]), 'r',
+                                 uncs=np.array([1e5, 1e5, 1e5]))
+        assert column.shared_exp() == 6
+
+    def test_val_unc_float32(self):
+        column = FormattedColumn(np.array([0.1, 2.5], dtype=np.float32), '.3',
+                                 uncs=np.array([0.01, 0.02],
+                                               dtype=np.float32))
+        assert list(column) == ['0.1000+/-0.0100', '2.5000+/-0.0200']
+        with self.assertRaises(ValueError):
+            FormattedColumn(np.ones(2), uncs=np.ones(3))
+
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+from strunc.batch import format_batch
+from strunc.pformat_float import (FormatType, get_exp_segments,
+                                  get_mantissa_exp_array)
+from strunc.strunc2 import (FormatType as ValUncFormatType,
+                            get_exp_array as get_val_unc_exp_array)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, 'numpy not installed')
+class TestMonotonic(unittest.TestCase):
+    def setUp(self):
+        self.arrays = {
+            'logspace': np.logspace(-12, 12, 2001),
+            'descending': -np.logspace(-5, 5, 999),
+            'linspace': np.linspace(-1e4, 1e4, 2001),
+            'powers': np.sort(np.concatenate([
+                10.0**np.arange(-300, 300),
+                np.nextafter(10.0**np.arange(-300, 300), 0), [0, 0]])),
+            'binary': 2.0**np.arange(-1000, 1000),
+            'float32': np.linspace(1, -1, 1001, dtype=np.float32),
+        }
+
+    def test_same_as_elementwise(self):
+        for name, nums in self.arrays.items():
+            for format_type in [FormatType.SCIENTIFIC,
+                                FormatType.ENGINEERING,
+                                FormatType.ENGINEERING_SHIFTED,
+                                FormatType.BINARY, FormatType.BINARY_IEC]:
+                with self.subTest(name=name, format_type=format_type):
+                    mantissas, exps = get_mantissa_exp_array(
+                        nums, format_type, monotonic=False)
+                    seg_mantissas, seg_exps = get_mantissa_exp_array(
+                        nums, format_type)
+                    assert np.array_equal(exps, seg_exps)
+                    assert np.array_equal(mantissas, seg_mantissas)
+                    assert mantissas.dtype == seg_mantissas.dtype
+
+    def test_val_unc_exps(self):
+        for name, nums in self.arrays.items():
+            if name == 'binary':
+                continue
+            for format_type in [ValUncFormatType.SCIENTIFIC,
+                                ValUncFormatType.ENGINEERING,
+                                ValUncFormatType.ENGINEERING_UPPER]:
+                with self.subTest(name=name, format_type=format_type):
+                    nums = nums.astype(float)
+                    assert np.array_equal(
+                        get_val_unc_exp_array(nums, format_type),
+                        get_val_unc_exp_array(nums[:, None],
+                                              format_type).ravel())
+
+    def test_segments(self):
+        seg_exps, seg_lengths = get_exp_segments(
+            np.array([1, 10, 999, 1e3, 2e3, 5e6]), FormatType.ENGINEERING)
+        assert seg_exps.tolist() == [0, 3, 6]
+        assert seg_lengths.tolist() == [3, 2, 1]
+
+    def test_format_batch(self):
+        nums = np.linspace(0, 2000, 5)
+        assert format_batch(nums, '_2rp') == [
+            '0.0 ', '500 ', '1.0 k', '1.5 k', '2.0 k']
+        unsorted = np.array([1e3, 1.0, 1e6])
+        assert format_batch(unsorted, 'r') == format_batch(
+            unsorted, 'r', monotonic=False)
@@ -0,0 +1,68 @@
+import unittest
+
+from strunc.strunc2 import format_val_unc_from_str
+
+try:
+    import numpy as np
+    import pandas as pd
+    from strunc.pandas_accessor import styler_formatter
+except ImportError:
+    pd = None
+
+
+@unittest.skipIf(pd is None, 'pandas not installed')
+class TestPandasAccessor(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'amp': [123.456, np.nan, 1.0],
+            'amp_err': [0.789, 0.1, 0.25],
+            'freq': pd.array([15300.0, 0.0123, None], dtype='Float64'),
+        })
+
+    def test_series(self):
+        out = self.df['freq'].strunc.format('_3e')
+        assert out.tolist()[:2] == ['1.53e+04', '1.23e-02']
+        assert out.isna().tolist() == [False, False, True]
+        assert self.df['freq'].strunc.prefix('_3R', na_rep='').tolist() == [
+            '15.3 k', '12.3 m', '']
+        assert self.df['freq'].strunc.prefix('_3Rp', na_rep='').tolist() == [
+            '15.3 k', '12.3 m', '']
+
+    def test_val_unc(self):
+        out = self.df.strunc.format_val_unc('amp', 'amp_err', 'S')
+        assert out[0] == '123.5(8)'
+        assert out[2] == '1.00(25)'
+        assert pd.isna(out[1])
+
+    def test_val_unc_same_as_scalar(self):
+        rng = np.random.default_rng(0)
+        amp = rng.normal(0, 100, 500)
+        df = pd.DataFrame({'amp': np.round(amp, 2),
+                           'amp_err': np.round(np.abs(amp) / 20, 4) + 0.0005,
+                           'amp_err_2': pd.array(np.abs(amp) / 30,
+                                                 dtype='Float64')})
+        df.loc[::50, 'amp_err_2'] = None
+        for format_spec in ['', 'S', '.2e', 'R']:
+            out = df.strunc.format_val_unc('amp', 'amp_err', format_spec,
+                                           unc_2='amp_err_2', na_rep='')
+            expected = [
+                '' if pd.isna(row.amp_err_2) else format_val_unc_from_str(
+                    row.amp, row.amp_err, format_spec, float(row.amp_err_2))
+                for row in df.itertuples()]
+            with self.subTest(format_spec=format_spec):
+                assert out.tolist() == expected
+
+    def test_format_frame(self):
+        out = self.df.strunc.format({('amp', 'amp_err'): 'S', 'freq': '_2'},
+                                    na_rep='-')
+        assert out.columns.tolist() == ['amp', 'freq']
+        assert out['amp'].tolist() == ['123.5(8)', '-', '1.00(25)']
+        assert out['freq'].tolist() == ['15000', '0.012', '-']
+        with self.assertRaises(ValueError):
+            self.df.strunc.format({('amp', 'amp_err'): 'S', 'amp': 'e'})
+
+    def test_styler_formatter(self):
+        formatter = styler_formatter('_3Rp', na_rep='n/a')
+        assert formatter(np.float64(15300.0)) == '15.3 k'
+        assert formatter(pd.NA) == 'n/a'
+        assert formatter(np.nan) == 'n/a'
@@ -0,0 +1,73 @@
+import unittest
+from decimal import Decimal
+
+from strunc.plan import FormatPlan
+from strunc.sig_fig_rules import get_sig_fig_rule
+from strunc.strunc2 import format_val_unc_from_str
+
+
+class TestFormatPlan(unittest.TestCase):
+    def test_inspect(self):
+        plan = FormatPlan.from_val_unc(123.456, 0.789, 'S')
+        assert plan.num_sig_figs == 1
+        assert plan.bottom_digit == -1
+        assert plan.exp == 0
+        low, high = plan.unc_bounds
+        assert 0.3545 < low < 0.35451
+        assert 0.94949 < high < 0.9495
+
+        plan = FormatPlan.from_val_unc(12345.6, 23.4, 'r')
+        assert (plan.num_sig_figs, plan.bottom_digit, plan.exp) == (2, 0, 3)
+
+    def test_apply(self):
+        cases = [('S', 123.456, 0.789, [(120.04, 0.5), (-999.9, 0.9),
+                                          (0.04, 0.4)]),
+                 ('r', 12345.6, 23.4, [(99999.0, 11.0), (1234.0, 34.0)]),
+                 ('.2e', 1.5, 0.25, [(9.87, 0.11), (1.0, 0.999)]),
+                 ('', 1.0, 0.0996, [(1.0, 0.0951), (2.5, 0.0999)])]
+        for format_spec, val, unc, others in cases:
+            plan = FormatPlan.from_val_unc(val, unc, format_spec)
+            for other_val, other_unc in others:
+                with self.subTest(format_spec=format_spec, val=other_val,
+                                  unc=other_unc):
+                    assert plan.is_valid(other_val, other_unc)
+                    assert plan.apply(other_val, other_unc) == (
+                        format_val_unc_from_str(other_val, other_unc,
+                                                format_spec))
+        plan = FormatPlan.from_val_unc(123.456, 0.789, 'S')
+        assert plan.apply(Decimal('120.04'), Decimal('0.5')) == '120.0(5)'
+
+    def test_invalid(self):
+        plan = FormatPlan.from_val_unc(123.456, 0.789, 'e')
+        for val, unc in [(123.4, 0.3), (123.4, 1.5), (1234.5, 0.5),
+                         (float('nan'), 0.5), (123.4, float('inf'))]:
+            with self.subTest(val=val, unc=unc):
+                assert not plan.is_valid(val, unc)
+                with self.assertRaises(ValueError):
+                    plan.apply(val, unc)
+                assert plan.format(val, unc) == format_val_unc_from_str(
+                    val, unc, 'e')
+        with self.assertRaises(ValueError):
+            FormatPlan.from_val_unc(1.0, 0.0)
+
+    def test_unc_bounds(self):
+        rule = get_sig_fig_rule('pdg')
+        for unc in [0.2, 0.5, 0.97, 3.5e-7, 42.0]:
+            low, high = rule.get_unc_bounds(unc)
+            num_sig_figs, _, top_digit = rule.apply(unc)
+            assert low < unc < high
+            for other in [low * (1 + 1e-9), high * (1 - 1e-9)]:
+                assert rule.apply(other)[::2] == (num_sig_figs, top_digit)
+            for other in [low * (1 - 1e-9), high * (1 + 1e-9)]:
+                assert rule.apply(other)[::2] != (num_sig_figs, top_digit)
+
+    def test_unc_bounds_exact_carry(self):
+        # fixed_2 carries on the exact uncertainty, which splits the lead
+        # 995 at 0.995.
+        rule = get_sig_fig_rule('fixed_2')
+        for unc in [0.5, 0.99451, 0.9951, 1.2]:
+            low, high = rule.get_unc_bounds(unc)
+            num_sig_figs, _, top_digit = rule.apply(unc)
+            assert low < unc < high
+            for other in [low * (1 + 1e-9), high * (1 - 1e-9)]:
+                assert rule.apply(other)[::2] == (num_sig_figs, top_digit)
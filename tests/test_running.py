@@ -0,0 +1,60 @@
+import statistics
+import unittest
+
+from strunc.running import RunningValUnc
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class TestRunningValUnc(unittest.TestCase):
+    samples = [123.1, 123.9, 122.7, 124.2, 123.4, 123.6]
+
+    def test_stats(self):
+        running = RunningValUnc(unc_mode='std')
+        for num in self.samples:
+            running.update(num)
+        assert running.count == len(self.samples)
+        self.assertAlmostEqual(running.mean, statistics.mean(self.samples))
+        self.assertAlmostEqual(running.variance,
+                               statistics.variance(self.samples))
+        assert str(running) == '123.5+/-0.5'
+        assert f'{running:S}' == '123.5(5)'
+
+    @unittest.skipIf(np is None, 'numpy not installed')
+    def test_update_many_and_merge(self):
+        running = RunningValUnc()
+        running.update_many(np.array(self.samples[:4]))
+        other = RunningValUnc()
+        other.update_many(self.samples[4:])
+        running.merge(other)
+        self.assertAlmostEqual(running.mean, statistics.mean(self.samples))
+        self.assertAlmostEqual(running.variance,
+                               statistics.variance(self.samples))
+
+    def test_render_only_on_change(self):
+        running = RunningValUnc('S', unc_mode='std')
+        running.update_many([10.0, 10.2] * 50)
+        assert running.poll() == '10.10(10)'
+        running.update(10.1)
+        assert not running.changed
+        assert running.poll() is None
+        assert str(running) == '10.10(10)'
+        assert running.render_count == 1
+        running.update(12.0)
+        assert running.poll() == '10.12(21)'
+        assert running.render_count == 2
+
+    def test_exp_hysteresis(self):
+        for exp_hysteresis, expected in [(0, '(1.000+/-0.018)e+03'),
+                                         (0.2, '(1000+/-18)e+00')]:
+            running = RunningValUnc('r', unc_mode='std',
+                                    exp_hysteresis=exp_hysteresis)
+            running.update_many([980, 990])
+            assert str(running) == '(985+/-7)e+00'
+            running.update_many([1010, 1020])
+            assert str(running) == expected
+        running.update_many([3000] * 10)
+        assert str(running) == '(2.4+/-0.9)e+03'
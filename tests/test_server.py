@@ -0,0 +1,88 @@
+import asyncio
+import os
+import socket
+import tempfile
+import unittest
+
+from strunc.server import FormatClient, FormatServer
+
+
+class TestServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = FormatServer()
+        self.tcp_server = await self.server.start('127.0.0.1', 0)
+        self.port = self.tcp_server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.tcp_server.close()
+        await self.tcp_server.wait_closed()
+
+    async def in_client(self, func, **kwargs):
+        def run():
+            with FormatClient(**kwargs) as client:
+                return func(client)
+        return await asyncio.to_thread(run)
+
+    async def test_format(self):
+        def run(client):
+            return (client.format([123.456, 15300.0], '_3e'),
+                    client.format([15300.0, float('nan')], '_2Rp'),
+                    client.format_val_unc([123.456], [0.789], 'S'),
+                    client.format_val_unc([1.0], [0.2], '', [0.3]),
+                    client.format([]))
+
+        results = await self.in_client(run, port=self.port)
+        assert results == (['1.23e+02', '1.53e+04'], ['15 k', 'nan'],
+                           ['123.5(8)'], ['1.00 (+0.20, -0.30)'], [])
+
+    async def test_stats_and_errors(self):
+        def run(client):
+            for _ in range(3):
+                client.format([1.5] * 10)
+            with self.assertRaises(ValueError):
+                client.request(b'x')
+            return client.stats()
+
+        stats = await self.in_client(run, port=self.port)
+        assert stats['requests'] == 3
+        assert stats['rows'] == 30
+        assert stats['errors'] == 1
+        assert stats['connections'] == 1
+        assert 0 < stats['p50_ms'] <= stats['p99_ms']
+
+    async def test_long_string(self):
+        def run(client):
+            with self.assertRaises(ValueError):
+                client.format([1.5], '.70000')
+            return client.format([1.5], '.1'), client.stats()
+
+        num_strs, stats = await self.in_client(run, port=self.port)
+        assert num_strs == ['1.5']
+        assert stats['errors'] == 1
+
+    async def test_max_message_size(self):
+        self.server.max_message_size = 1000
+
+        def run(client):
+            assert client.format([1.5] * 10) == ['1.5'] * 10
+            with self.assertRaisesRegex(ValueError, 'exceeds the limit'):
+                client.format([1.5] * 1000)
+            with self.assertRaises(ConnectionError):
+                client.format([1.5])
+
+        await self.in_client(run, port=self.port)
+        assert self.server.stats.num_errors == 1
+
+    @unittest.skipIf(not hasattr(socket, 'AF_UNIX'), 'no unix sockets')
+    async def test_unix_socket(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'strunc.sock')
+            unix_server = await self.server.start(unix_path=path)
+            try:
+                results = await self.in_client(
+                    lambda client: client.format([0.5], '.2'),
+                    unix_path=path)
+            finally:
+                unix_server.close()
+                await unix_server.wait_closed()
+        assert results == ['0.50']
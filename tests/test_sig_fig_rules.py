@@ -0,0 +1,100 @@
+import unittest
+
+from strunc.sig_fig_rules import get_sig_fig_rule
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+cases: dict[str, dict[float, tuple[int, float, int]]] = {
+    'pdg': {0.789: (1, 0.8, -1),
+            0.012453: (2, 0.012, -2),
+            0.354: (2, 0.35, -1),
+            0.355: (1, 0.4, -1),
+            0.0949: (1, 0.09, -2),
+            0.0096: (2, 0.01, -2),
+            999.6: (2, 1000.0, 3),
+            1: (2, 1.0, 0),
+            -0.25: (2, 0.25, -1)},
+    'fixed_2': {0.789: (2, 0.79, -1),
+                0.0996: (2, 0.1, -1),
+                123: (2, 120.0, 2),
+                0.99451: (2, 0.99, -1),
+                9.9451: (2, 9.9, 0),
+                0.9951: (2, 1.0, 0)},
+    'one_unless_leading_one': {0.789: (1, 0.8, -1),
+                               0.0123: (2, 0.012, -2),
+                               0.0197: (2, 0.02, -2),
+                               0.0961: (2, 0.1, -1)},
+}
+
+
+class TestSigFigRules(unittest.TestCase):
+    def test_scalar(self):
+        for rule_name, rule_cases in cases.items():
+            rule = get_sig_fig_rule(rule_name)
+            for unc, expected in rule_cases.items():
+                actual = rule.apply(unc)
+                with self.subTest(rule_name=rule_name, unc=unc,
+                                  expected=expected, actual=actual):
+                    assert actual == expected
+
+    def test_tie(self):
+        # Scalar ties follow round(num, ndigits) on the decimal value.
+        assert get_sig_fig_rule('pdg').apply(3.45) == (2, 3.5, 0)
+        assert get_sig_fig_rule('pdg').apply(35.45) == (1, 40.0, 1)
+
+    def test_exact_carry(self):
+        # Only the PDG style rules round the three leading digits.
+        from strunc.strunc2 import format_val_unc_from_str
+        assert get_sig_fig_rule('pdg').apply(0.09946) == (2, 0.1, -1)
+        assert get_sig_fig_rule('fixed_2').apply(0.99451)[1] == float(
+            format_val_unc_from_str(1.0, 0.99451, '.2').split('+/-')[1])
+
+    def test_invalid(self):
+        rule = get_sig_fig_rule('pdg')
+        for unc in (0, float('nan'), float('inf')):
+            with self.subTest(unc=unc):
+                with self.assertRaises(ValueError):
+                    rule.apply(unc)
+        with self.assertRaises(ValueError):
+            get_sig_fig_rule('not_a_rule')
+
+    @unittest.skipIf(np is None, 'numpy not installed')
+    def test_array(self):
+        for rule_name, rule_cases in cases.items():
+            rule = get_sig_fig_rule(rule_name)
+            uncs = np.array(list(rule_cases) + [0, np.nan])
+            num_sig_figs, rounded_uncs, top_digits = rule.apply(uncs)
+            expected = list(rule_cases.values()) + [(0, 0, 0)]
+            with self.subTest(rule_name=rule_name):
+                assert num_sig_figs.tolist() == [e[0] for e in expected] + [0]
+                assert top_digits.tolist() == [e[2] for e in expected] + [0]
+                np.testing.assert_allclose(rounded_uncs[:-1],
+                                           [e[1] for e in expected])
+                assert np.isnan(rounded_uncs[-1])
+
+    @unittest.skipIf(np is None, 'numpy not installed')
+    def test_array_same_as_scalar(self):
+        rng = np.random.default_rng(0)
+        # Random magnitudes plus decimal inputs, which often sit on ties.
+        uncs = np.concatenate([
+            10**rng.uniform(-30, 30, 20000),
+            [float(f'{lead}e{exp}') for lead, exp in zip(
+                rng.integers(1, 100000, 20000), rng.integers(-12, 8, 20000))],
+            [0.03545, 0.65, 0.000125, 0.0996, 9.995, 1e25, 3.55e-22]])
+        for rule_name in cases:
+            rule = get_sig_fig_rule(rule_name)
+            num_sig_figs, rounded_uncs, top_digits = rule.apply(uncs)
+            actual = list(zip(num_sig_figs.tolist(), rounded_uncs.tolist(),
+                              top_digits.tolist()))
+            expected = [rule.apply(float(unc)) for unc in uncs]
+            with self.subTest(rule_name=rule_name):
+                assert actual == expected
+
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,71 @@
+import logging
+import unittest
+
+from strunc.strunc2 import format_val_unc_from_str
+
+try:
+    import numpy as np
+    from strunc.structured import format_structured, iter_structured_rows
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, 'numpy not installed')
+class TestStructured(unittest.TestCase):
+    def setUp(self):
+        self.arr = np.array(
+            [(123.456, 0.789, 15300.0, 7), (1.0, 0.25, 0.0123, 12)],
+            dtype=[('amp', 'f8'), ('amp_err', 'f4'), ('freq', 'f8'),
+                   ('count', 'i8')])
+        self.field_specs = {('amp', 'amp_err'): 'S', 'freq': '_3Rp',
+                            'count': ''}
+
+    def test_format_structured(self):
+        out = format_structured(self.arr, self.field_specs)
+        assert out.dtype.names == ('amp', 'freq', 'count')
+        assert out.dtype['amp'] == np.dtype('U8')
+        assert out['amp'].tolist() == ['123.5(8)', '1.00(25)']
+        assert out['freq'].tolist() == ['15.3 k', '12.3 m']
+        assert out['count'].tolist() == ['7', '12']
+
+    def test_iter_rows(self):
+        rows = list(iter_structured_rows(self.arr, self.field_specs,
+                                         chunk_size=1))
+        out = format_structured(self.arr, self.field_specs)
+        assert rows == [tuple(row) for row in out.tolist()]
+
+    def test_val_unc_same_as_scalar(self):
+        rng = np.random.default_rng(0)
+        size = 1000
+        arr = np.zeros(size + 6, dtype=[('val', 'f8'), ('unc', 'f8'),
+                                        ('unc_2', 'f8')])
+        arr['val'][:size] = rng.choice([-1, 1], size) * 10**rng.uniform(
+            -12, 12, size)
+        arr['unc'][:size] = np.abs(arr['val'][:size]) * 10**rng.uniform(
+            -6, 1, size)
+        # Decimal inputs on rounding ties, and rows formatted by
+        # format_val_unc() itself.
+        arr['val'][:size:2] = np.round(arr['val'][:size:2], 3)
+        arr['unc'][:size:2] = np.round(arr['unc'][:size:2], 5) + 0.00035
+        arr['val'][size:] = [np.nan, np.inf, 1, 2, 0, 3]
+        arr['unc'][size:] = [0.1, 0.2, 0, -0.5, np.nan, 0.05]
+        arr['unc_2'] = arr['unc'] * rng.uniform(0.5, 2, size + 6)
+
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        for format_spec in ['', 'S', '.2e', 'r', '+.3RP', '0>5_,dL']:
+            for key in [('val', 'unc'), ('val', 'unc', 'unc_2')]:
+                out = format_structured(arr, {key: format_spec})
+                expected = [format_val_unc_from_str(
+                    *(float(row[name]) for name in key[:2]), format_spec,
+                    *(float(row[name]) for name in key[2:])) for row in arr]
+                with self.subTest(format_spec=format_spec, key=key):
+                    assert out['val'].tolist() == expected
+
+    def test_bad_key(self):
+        with self.assertRaises(ValueError):
+            format_structured(self.arr, {('amp',): ''})
+
+    def test_duplicate_out_name(self):
+        with self.assertRaises(ValueError):
+            format_structured(self.arr, {('amp', 'amp_err'): 'S', 'amp': 'e'})
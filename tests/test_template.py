@@ -0,0 +1,53 @@
+import unittest
+
+from strunc.template import FormatTemplate
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class TestFormatTemplate(unittest.TestCase):
+    def test_dict_row(self):
+        template = FormatTemplate('{v:_3e} {i:.2r} {p:_2Rp} {name!s:>4}')
+        row = {'v': 123.456, 'i': 0.0314, 'p': 15300.0, 'name': 'ab'}
+        assert template.format(row) == '1.23e+02 31.40e-03 15 k   ab'
+
+    def test_tuple_rows(self):
+        template = FormatTemplate('{:_3e}, {}')
+        rows = [(1.5, 2), (-0.031415, 0.25)]
+        assert list(template.format_rows(rows)) == ['1.50e+00, 2',
+                                                     '-3.14e-02, 0.25']
+        template = FormatTemplate('[{1:.1}] [{0:+}]')
+        assert template.format((1.5, 2.25)) == '[2.2] [+1.5]'
+
+    def test_matches_str_format(self):
+        from strunc.pformat_float import pfloat
+        template = FormatTemplate('a={0:_3r} b={1:4.2}')
+        nums = (pfloat(0.031415), pfloat(123.456))
+        assert template.format(nums) == 'a={0:_3r} b={1:4.2}'.format(*nums)
+
+    @unittest.skipIf(np is None, 'numpy not installed')
+    def test_record_rows(self):
+        arr = np.array([(1.5, 2e-3), (3.25, 4e5)],
+                       dtype=[('a', 'f4'), ('b', 'f8')])
+        template = FormatTemplate('{a:_3} {b:rp}')
+        assert list(template.format_rows(arr)) == ['1.50 2 m', '3.25 400 k']
+
+    def test_escaped_braces(self):
+        template = FormatTemplate('{x:_3e} {{unit}}: {y:.2r} }}{{')
+        assert template.format({'x': 1.5, 'y': 2.0}) == (
+            '1.50e+00 {unit}: 2.00e+00 }{')
+        assert FormatTemplate('{{}}').format(()) == '{}'
+
+    def test_invalid(self):
+        for template in ('{0}{}', '{}{0}', '{a.b}', '{a[0]}', '{a:{b}}'):
+            with self.subTest(template=template):
+                with self.assertRaises(ValueError):
+                    FormatTemplate(template)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
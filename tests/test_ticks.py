@@ -0,0 +1,30 @@
+import unittest
+
+from strunc.ticks import format_ticks, get_tick_precision
+
+
+class TestTicks(unittest.TestCase):
+    def test_shared_prefix(self):
+        assert format_ticks([0, 500, 1000, 1500, 2000], 'rp') == [
+            '0.0 k', '0.5 k', '1.0 k', '1.5 k', '2.0 k']
+        assert format_ticks([-2e-6, -1e-6, 0, 1e-6, 2e-6], 'Rp') == [
+            '-2 u', '-1 u', '0 u', '1 u', '2 u']
+        assert format_ticks([0, 512, 1024, 1536], 'Bp') == [
+            '0.0 K', '0.5 K', '1.0 K', '1.5 K']
+
+    def test_shared_exp(self):
+        assert format_ticks([1e5, 2e5, 3e5], 'e') == [
+            '1e+05', '2e+05', '3e+05']
+        assert format_ticks([1e5, 2e5, 3e5], '_3e') == [
+            '1.00e+05', '2.00e+05', '3.00e+05']
+        assert format_ticks([1e5, 1.5e5], '.2rp') == ['100.00 k', '150.00 k']
+
+    def test_precision(self):
+        assert format_ticks([0, 0.25, 0.5, 0.75]) == [
+            '0.00', '0.25', '0.50', '0.75']
+        assert format_ticks([0.1 * i for i in range(4)]) == [
+            '0.0', '0.1', '0.2', '0.3']
+        assert format_ticks([1, 1.001, 1.002, float('nan')]) == [
+            '1.000', '1.001', '1.002', 'nan']
+        assert get_tick_precision([1.23]) == 2
+        assert get_tick_precision([1, 2, 2, 3]) == 0